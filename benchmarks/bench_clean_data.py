@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Benchmark: row-wise vs vectorized DataProcessor._clean_data (equality is checked in tests/test_data_processor.py)."""
+import sys
+import os
+import time
+import argparse
+import pandas as pd
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib import parsers
+from lib.config import Config
+from lib.data_processor import DataProcessor
+
+DEFAULT_CSV = os.path.join(Config.DATA_DIR, 'miete_trier50km_detailed2.csv')
+
+
+def rowwise_clean(df):
+    """The previous per-row implementation of the parsed columns."""
+    cleaned_df = df.copy()
+    cleaned_df['Preis_cleaned'] = cleaned_df['Preis'].apply(parsers.clean_price)
+    cleaned_df['Wohnfläche'] = cleaned_df['Details'].apply(parsers.extract_sqm)
+    cleaned_df['Grundstücksfläche'] = cleaned_df['Details'].apply(parsers.extract_plot_size)
+    cleaned_df['Zimmer'] = cleaned_df['Details'].apply(parsers.extract_rooms)
+    cleaned_df['Preis_pro_qm'] = cleaned_df.apply(
+        lambda row: row['Preis_cleaned'] / row['Wohnfläche']
+        if pd.notna(row['Preis_cleaned']) and pd.notna(row['Wohnfläche']) and row['Wohnfläche'] > 0
+        else None,
+        axis=1
+    )
+    return cleaned_df
+
+
+def rows_per_second(func, df):
+    """Return the throughput of func over df in rows per second"""
+    start = time.perf_counter()
+    func(df)
+    return len(df) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark DataProcessor._clean_data')
+    parser.add_argument('--csv', type=str, default=DEFAULT_CSV,
+                        help='Scraped listings CSV used as input')
+    parser.add_argument('--rows', type=int, default=100000,
+                        help='Number of rows for the throughput measurement')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv, dtype={'Preis': object, 'Details': object})
+    processor = DataProcessor()
+
+    repeats = max(1, args.rows // len(df))
+    big_df = pd.concat([df] * repeats, ignore_index=True)
+    before = rows_per_second(rowwise_clean, big_df)
+    after = rows_per_second(processor._clean_data, big_df)
+    print(f"row-wise   : {before:12,.0f} rows/s")
+    print(f"vectorized : {after:12,.0f} rows/s  ({after / before:.1f}x on {len(big_df)} rows)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
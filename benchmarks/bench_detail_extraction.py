@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: detail page extraction before and after the single-parse extractor."""
+import sys
+import os
+import re
+import glob
+import time
+import argparse
+from bs4 import BeautifulSoup
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.detail_extractor import DetailPageExtractor, HTMLParser, LXML_AVAILABLE, parse_map_coordinates
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def legacy_detail_info(html, extractor):
+    """The previous implementation: full html.parser tree, parsed twice, plus a script scan."""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    features = []
+    features_section = soup.find("section", {"data-testid": "aviv.CDP.Sections.Features"})
+    if features_section:
+        for item in features_section.find_all("div", {"data-testid": "aviv.CDP.Sections.Features.Feature"}):
+            feature_text = item.find("span", class_="css-1az3ztj")
+            if feature_text:
+                features.append(feature_text.text.strip())
+
+    image_urls = extractor.extract_images(soup)
+
+    coordinates_data = None
+    map_img = BeautifulSoup(html, 'html.parser').find('img', alt='Standort')
+    if map_img:
+        coordinates_data = parse_map_coordinates(map_img['src'])
+
+    latitude = None
+    longitude = None
+    if coordinates_data:
+        longitude, latitude = coordinates_data['centroid']
+    else:
+        for script in soup.find_all("script"):
+            if script.string and "coordinates" in str(script.string):
+                coords_match = re.search(r'\[(\d+\.\d+),\s*(\d+\.\d+)\]', script.string)
+                if coords_match:
+                    longitude = float(coords_match.group(1))
+                    latitude = float(coords_match.group(2))
+                    break
+
+    address_div = soup.find("div", {"data-testid": "aviv.CDP.Location.Address"})
+    full_address = address_div.text.strip() if address_div else "Keine Adresse gefunden"
+
+    return {
+        "features": features,
+        "full_address": full_address,
+        "latitude": latitude,
+        "longitude": longitude,
+        "image_urls": image_urls
+    }
+
+
+def time_call(func, pages, repeat):
+    """Return the mean seconds per page for func over all pages"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            func(html)
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark detail page extraction')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='Number of passes over the fixture corpus')
+    parser.add_argument('--fixtures', type=str, default=FIXTURE_DIR,
+                        help='Directory containing saved expose_*.html pages')
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, 'expose_*.html')))
+    if not paths:
+        print(f"No fixtures found in {args.fixtures}")
+        return 1
+    pages = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+
+    backends = ['html.parser']
+    if LXML_AVAILABLE:
+        backends.append('lxml')
+    if HTMLParser is not None:
+        backends.append('selectolax')
+
+    reference = DetailPageExtractor(backend='html.parser')
+    expected = [legacy_detail_info(html, reference) for html in pages]
+
+    legacy_time = time_call(lambda html: legacy_detail_info(html, reference), pages, args.repeat)
+    print(f"{'legacy (2x html.parser)':<28} {legacy_time * 1000:8.2f} ms/page")
+
+    for backend in backends:
+        extractor = DetailPageExtractor(backend=backend)
+        for path, html, want in zip(paths, pages, expected):
+            got = extractor.extract(html)
+            if got != want:
+                print(f"Output mismatch for {os.path.basename(path)} with {backend}:\n{got}\n!=\n{want}")
+                return 1
+        elapsed = time_call(extractor.extract, pages, args.repeat)
+        print(f"{'single parse (' + backend + ')':<28} {elapsed * 1000:8.2f} ms/page"
+              f"  {legacy_time / elapsed:5.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Benchmark: search page parsing, pagination and detail scraping against the local stand-in server."""
+import sys
+import os
+import glob
+import time
+import argparse
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.scraper import WebScraper
+from standin_server import StandInServer, FIXTURE_DIR
+
+
+def time_call(func, repeat):
+    """Return the mean seconds per call of func"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scraping paths without network access')
+    parser.add_argument('--repeat', type=int, default=50,
+                        help='Number of parses per fixture for the parsing benchmarks')
+    parser.add_argument('--pages', type=int, default=40,
+                        help='Search result pages served by the stand-in server')
+    parser.add_argument('--details', type=int, default=300,
+                        help='Number of detail pages scraped from the stand-in server')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Simulated server latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.05,
+                        help='Additional random server latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of requests the stand-in server fails with 503')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Detail page workers')
+    parser.add_argument('--page-workers', type=int, default=4,
+                        help='Search result page workers')
+    parser.add_argument('--rate', type=float, default=1000.0,
+                        help='Requests per second allowed by the rate limiter')
+    args = parser.parse_args()
+
+    scraper = WebScraper(workers=args.workers, requests_per_second=args.rate)
+
+    # Parsing only, no I/O
+    with open(os.path.join(FIXTURE_DIR, 'search_results.html'), encoding='utf-8') as f:
+        search_html = f.read()
+    cards = len(scraper.get_listings_from_page(search_html))
+    elapsed = time_call(lambda: scraper.get_listings_from_page(search_html), args.repeat)
+    print(f"{'get_listings_from_page':<28} {elapsed * 1000:8.2f} ms/page  ({cards} cards)")
+
+    exposes = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, 'expose_*.html'))):
+        with open(path, encoding='utf-8') as f:
+            exposes.append(f.read())
+    elapsed = time_call(lambda: [scraper.detail_extractor.extract(html) for html in exposes], args.repeat)
+    print(f"{'detail extraction':<28} {elapsed / len(exposes) * 1000:8.2f} ms/page")
+
+    # End to end against the stand-in server
+    server = StandInServer(pages=args.pages, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, seed=0).start()
+    scraper.base_url = server.base_url
+    try:
+        start = time.perf_counter()
+        listings = scraper.scrape_all_listings(base_url=server.search_url, workers=args.page_workers)
+        elapsed = time.perf_counter() - start
+        print(f"{'scrape_all_listings':<28} {args.pages / elapsed:8.1f} pages/s"
+              f"  ({len(listings)} listings, {len(scraper.failed_pages)} failed pages)")
+
+        links = [listing['Link'] for listing in listings][:args.details]
+        start = time.perf_counter()
+        details = scraper.scrape_detail_pages(links)
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for value in details.values() if not value)
+        print(f"{'get_detail_page_info':<28} {len(links) / elapsed:8.1f} pages/s"
+              f"  ({len(links)} pages, {failed} failed, {args.workers} workers)")
+
+        # Take every fifth scraped listing offline, then check them all like a closure run would
+        server.closed.update(link.rsplit('/expose/', 1)[-1] for link in links[::5])
+        start = time.perf_counter()
+        statuses = scraper.verify_closed_listings(links)
+        elapsed = time.perf_counter() - start
+        closed = sum(1 for value in statuses.values() if value == 'closed')
+        print(f"{'verify_closed_listings':<28} {len(links) / elapsed:8.1f} checks/s"
+              f"  ({closed} closed, {args.workers} workers)")
+        print(f"Stand-in server answered {server.requests} requests ({server.errors} injected errors)")
+    finally:
+        server.stop()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Benchmark: _clean_data, saving and run diffing on synthetic listings tables of growing size."""
+import sys
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.config import Config
+from lib.database import DatabaseHandler
+from lib.data_processor import DataProcessor
+
+DEFAULT_CSV = os.path.join(Config.DATA_DIR, 'miete_trier50km_detailed2.csv')
+
+
+def synthesize(sample, rows, seed=0):
+    """Resample real listings into `rows` rows with unique links and spread out dates"""
+    rng = np.random.default_rng(seed)
+    df = sample.iloc[rng.integers(0, len(sample), rows)].reset_index(drop=True)
+    df['Link'] = [f"https://www.immowelt.de/expose/synthetic-{i:08d}" for i in range(rows)]
+    # Keep one image per listing so the 1M row table still fits in memory
+    df['Images'] = df['Images'].str.split(';').str[0]
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D')
+    df['created_date'] = dates.strftime('%Y-%m-%d')
+    df['closed_date'] = None
+    return df
+
+
+def next_run(df, seed=1, churn=0.05, repriced=0.02):
+    """The scraped listings of a following run: some closed, some new, some re-priced"""
+    rng = np.random.default_rng(seed)
+    keep = df[rng.random(len(df)) >= churn].copy()
+    new = df.sample(n=int(len(df) * churn), random_state=seed, replace=True).copy()
+    new['Link'] = [f"https://www.immowelt.de/expose/new-{i:08d}" for i in range(len(new))]
+    current = pd.concat([keep, new], ignore_index=True)
+    changed = rng.random(len(current)) < repriced
+    current.loc[changed, 'Preis_cleaned'] = current.loc[changed, 'Preis_cleaned'] * 0.95
+    return current.drop(columns=['created_date', 'closed_date'])
+
+
+def timed(func, *args):
+    """Return (result, seconds) of one call"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def report(name, rows, seconds):
+    print(f"  {name:<36} {seconds:8.2f} s  {rows / seconds:12,.0f} rows/s")
+
+
+def bench_size(sample, rows, tmp_dir):
+    print(f"{rows:,} rows")
+    processor = DataProcessor()
+    df = synthesize(sample, rows)
+
+    df, seconds = timed(processor._clean_data, df)
+    report('DataProcessor._clean_data', rows, seconds)
+
+    db_file = os.path.join(tmp_dir, f"bench_{rows}.sqlite")
+    db_handler = DatabaseHandler(db_file)
+    _, seconds = timed(db_handler.save_data, df)
+    report('DatabaseHandler.save_data', rows, seconds)
+
+    current = next_run(df)
+
+    # Previous approach, on a copy: load the whole history, diff in pandas, write everything back
+    legacy_file = os.path.join(tmp_dir, f"bench_{rows}_legacy.sqlite")
+    db_handler._copy_database(legacy_file)
+    legacy_handler = DatabaseHandler(legacy_file)
+    start = time.perf_counter()
+    existing = legacy_handler.load_existing_data()
+    comparison = legacy_handler.compare_listings(existing, current)
+    merged = legacy_handler.update_database(existing, current, comparison)
+    legacy_handler.save_data(merged)
+    report('compare_listings + update_database', rows, time.perf_counter() - start)
+
+    # Incremental approach: diff inside SQLite, persist only the changes
+    comparison, seconds_compare = timed(db_handler.compare_listings_sql, current['Link'])
+    _, seconds_save = timed(db_handler.save_changes, current, comparison)
+    report('compare_listings_sql + save_changes', rows, seconds_compare + seconds_save)
+
+    for path in (db_file, legacy_file):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark data processing and storage at scale')
+    parser.add_argument('--csv', type=str, default=DEFAULT_CSV,
+                        help='Scraped listings CSV the synthetic rows are sampled from')
+    parser.add_argument('--sizes', type=str, default='10000,100000,1000000',
+                        help='Comma separated table sizes to benchmark')
+    args = parser.parse_args()
+
+    sample = pd.read_csv(args.csv, dtype={'Preis': object, 'Details': object})
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in [int(size) for size in args.sizes.split(',')]:
+            bench_size(sample, rows, tmp_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Local stand-in for immowelt.de serving the recorded fixtures with configurable latency and errors."""
+import os
+import re
+import sys
+import glob
+import time
+import zlib
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+EXPOSE_LINK_PATTERN = re.compile(r'href="/expose/([^"?]+)')
+LAST_PAGE_PATTERN = re.compile(r'(aria-label="zu seite )\d+(">)\d+(</button>\s*</nav>)')
+
+
+class StandInServer:
+    def __init__(self, fixture_dir=FIXTURE_DIR, pages=40, latency=0.0, jitter=0.0,
+                 error_rate=0.0, seed=None, host='127.0.0.1', port=0, closed=(), closed_rate=0.0):
+        """Serve search result pages and exposés from fixture_dir like the live site would.
+
+        Exposés listed in `closed`, plus a deterministic `closed_rate` fraction of all ids,
+        are answered with 410 Gone like listings taken offline.
+        """
+        with open(os.path.join(fixture_dir, 'search_results.html'), encoding='utf-8') as f:
+            self.search_page = f.read()
+        self.expose_pages = []
+        for path in sorted(glob.glob(os.path.join(fixture_dir, 'expose_*.html'))):
+            with open(path, encoding='utf-8') as f:
+                self.expose_pages.append(f.read())
+
+        self.pages = pages
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.closed = set(closed)
+        self.closed_rate = closed_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def search_url(self):
+        return f"{self.base_url}/classified-search?distributionTypes=Buy&estateTypes=House,Apartment"
+
+    def render_search_page(self, page):
+        """The search fixture with links unique to the page and the configured page count"""
+        html = EXPOSE_LINK_PATTERN.sub(rf'href="/expose/p{page}-\1', self.search_page)
+        return LAST_PAGE_PATTERN.sub(rf'\g<1>{self.pages}\g<2>{self.pages}\g<3>', html)
+
+    def render_expose(self, expose_id):
+        """One of the recorded exposés, picked deterministically by id"""
+        return self.expose_pages[zlib.crc32(expose_id.encode('utf-8')) % len(self.expose_pages)]
+
+    def is_closed(self, expose_id):
+        """Whether the exposé is gone, stable across requests"""
+        if expose_id in self.closed:
+            return True
+        return zlib.crc32(f"closed:{expose_id}".encode('utf-8')) < self.closed_rate * 2 ** 32
+
+    def _respond(self, path, query):
+        """Return (status, body) for a request, after the simulated latency"""
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        with self.lock:
+            self.requests += 1
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if failed:
+            return 503, 'Service Unavailable'
+
+        if path == '/classified-search':
+            page = int(query.get('page', ['1'])[0])
+            return 200, self.render_search_page(page)
+        if path.startswith('/expose/'):
+            expose_id = path[len('/expose/'):]
+            if self.is_closed(expose_id):
+                return 410, 'Gone'
+            return 200, self.render_expose(expose_id)
+        return 404, 'Not Found'
+
+    def _make_handler(self):
+        server = self
+
+        class StandInHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _send(self, include_body):
+                url = urlparse(self.path)
+                status, body = server._respond(url.path, parse_qs(url.query))
+                body = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if include_body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                self._send(include_body=True)
+
+            def do_HEAD(self):
+                # Same status and headers as GET, as used by the closure verification
+                self._send(include_body=False)
+
+            def log_message(self, format, *args):
+                pass
+
+        return StandInHandler
+
+    def start(self):
+        """Serve in a background thread"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the recorded fixtures as a local stand-in for immowelt.de')
+    parser.add_argument('--port', type=int, default=8765,
+                        help='Port to listen on')
+    parser.add_argument('--pages', type=int, default=40,
+                        help='Number of search result pages to advertise')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Fixed response delay in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Additional random delay of up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of requests answered with 503')
+    parser.add_argument('--seed', type=int,
+                        help='Seed for reproducible latency and errors')
+    parser.add_argument('--closed', nargs='*', default=[],
+                        help='Exposé ids answered with 410 Gone')
+    parser.add_argument('--closed-rate', type=float, default=0.0,
+                        help='Fraction of exposé ids answered with 410 Gone')
+    args = parser.parse_args()
+
+    server = StandInServer(pages=args.pages, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, seed=args.seed, port=args.port,
+                           closed=args.closed, closed_rate=args.closed_rate)
+    print(f"Serving {args.pages} search pages at {server.search_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+# lib/api.py
+import os
+import gzip
+import json
+import hashlib
+import numbers
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from .logger import get_logger
+from .config import Config
+from .database import DatabaseHandler, RANGE_FILTERS, ALL_GROUPS
+
+logger = get_logger()
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _param(params, name, default=None, cast=str, required=False):
+    """Read a single query parameter, casting it and rejecting malformed values"""
+    values = params.get(name)
+    if not values or values[0] == '':
+        if required:
+            raise ApiError(400, f"Missing parameter: {name}")
+        return default
+    try:
+        return cast(values[0])
+    except ValueError:
+        raise ApiError(400, f"Invalid value for {name}: {values[0]}")
+
+
+def _parse_filters(params):
+    """Turn <filter>_min / <filter>_max query parameters into query_listings filters"""
+    filters = {}
+    for name in RANGE_FILTERS:
+        cast = str if name.endswith('_date') else float
+        low = _param(params, f"{name}_min", cast=cast)
+        high = _param(params, f"{name}_max", cast=cast)
+        if low is not None or high is not None:
+            filters[name] = (low, high)
+    return filters
+
+
+def _parse_page(params):
+    """Read limit and offset, capping the limit at API_MAX_LIMIT"""
+    limit = _param(params, 'limit', default=Config.API_DEFAULT_LIMIT, cast=int)
+    offset = _param(params, 'offset', default=0, cast=int)
+    # SQLite reads a negative LIMIT as no limit at all
+    if limit < 1:
+        raise ApiError(400, f"Invalid value for limit: {limit}")
+    if offset < 0:
+        raise ApiError(400, f"Invalid value for offset: {offset}")
+    return min(limit, Config.API_MAX_LIMIT), offset
+
+
+def _parse_columns(params):
+    """Read the comma separated column projection"""
+    columns = _param(params, 'columns')
+    return [col.strip() for col in columns.split(',') if col.strip()] if columns else None
+
+
+def _parse_features(params, name):
+    """Read feature names from repeated and/or comma separated parameters"""
+    return [
+        feature.strip()
+        for value in params.get(name, [])
+        for feature in value.split(',')
+        if feature.strip()
+    ]
+
+
+class ListingsApi:
+    def __init__(self, db_handler):
+        """Read-only JSON endpoints over a DatabaseHandler"""
+        self.db_handler = db_handler
+        self.routes = {
+            '/api/listings': self.listings,
+            '/api/listings/bbox': self.bbox,
+            '/api/listings/near': self.near,
+            '/api/listings/search': self.search,
+            '/api/listings/features': self.features,
+            '/api/analytics/summary': self.summary,
+            '/api/analytics/histogram': self.histogram,
+            '/api/analytics/daily': self.daily,
+            '/api/analytics/daily-histogram': self.daily_histogram,
+            '/api/analytics/price-history': self.price_history,
+            '/api/analytics/feature-counts': self.feature_counts,
+        }
+
+    def _status(self, params):
+        status = _param(params, 'status', default='all')
+        if status not in ('active', 'closed', 'all'):
+            raise ApiError(400, f"Invalid status: {status}")
+        return status
+
+    def listings(self, params):
+        filters = _parse_filters(params)
+        status = self._status(params)
+        limit, offset = _parse_page(params)
+        try:
+            df = self.db_handler.query_listings(
+                filters=filters,
+                columns=_parse_columns(params),
+                status=status,
+                order_by=_param(params, 'order_by'),
+                limit=limit,
+                offset=offset
+            )
+        except ValueError as e:
+            raise ApiError(400, str(e))
+        return {
+            'total': self.db_handler.count_listings(filters, status),
+            'limit': limit,
+            'offset': offset,
+            'items': df
+        }
+
+    def bbox(self, params):
+        try:
+            df = self.db_handler.query_bbox(
+                _param(params, 'min_lat', cast=float, required=True),
+                _param(params, 'min_lon', cast=float, required=True),
+                _param(params, 'max_lat', cast=float, required=True),
+                _param(params, 'max_lon', cast=float, required=True),
+                columns=_parse_columns(params),
+                status=self._status(params)
+            )
+        except ValueError as e:
+            raise ApiError(400, str(e))
+        return {'total': len(df), 'items': df}
+
+    def near(self, params):
+        try:
+            df = self.db_handler.query_radius(
+                _param(params, 'lat', cast=float, required=True),
+                _param(params, 'lon', cast=float, required=True),
+                _param(params, 'radius_km', default=10.0, cast=float),
+                columns=_parse_columns(params),
+                status=self._status(params)
+            )
+        except ValueError as e:
+            raise ApiError(400, str(e))
+        return {'total': len(df), 'items': df}
+
+    def search(self, params):
+        limit, offset = _parse_page(params)
+        try:
+            df = self.db_handler.search_listings(
+                _param(params, 'q', required=True),
+                columns=_parse_columns(params),
+                filters=_parse_filters(params),
+                status=self._status(params),
+                limit=limit,
+                offset=offset
+            )
+        except ValueError as e:
+            raise ApiError(400, str(e))
+        return {'limit': limit, 'offset': offset, 'items': df}
+
+    def features(self, params):
+        limit, offset = _parse_page(params)
+        try:
+            df = self.db_handler.query_by_features(
+                include=_parse_features(params, 'include'),
+                exclude=_parse_features(params, 'exclude'),
+                columns=_parse_columns(params),
+                filters=_parse_filters(params),
+                status=self._status(params),
+                limit=limit,
+                offset=offset
+            )
+        except ValueError as e:
+            raise ApiError(400, str(e))
+        return {'limit': limit, 'offset': offset, 'items': df}
+
+    def feature_counts(self, params):
+        try:
+            return self.db_handler.get_feature_counts(
+                include=_parse_features(params, 'include'),
+                exclude=_parse_features(params, 'exclude'),
+                filters=_parse_filters(params),
+                status=self._status(params),
+                top=_param(params, 'top', cast=int)
+            )
+        except ValueError as e:
+            raise ApiError(400, str(e))
+
+    def summary(self, params):
+        summary = {}
+        for key, value in self.db_handler.get_statistics().items():
+            if isinstance(value, numbers.Integral):
+                summary[key] = int(value)
+            else:
+                summary[key] = None if value != value else float(value)  # NaN -> null
+        return summary
+
+    def histogram(self, params):
+        bins = _param(params, 'bins', default=20, cast=int)
+        if bins > Config.API_MAX_HISTOGRAM_BINS:
+            raise ApiError(400, f"Too many bins: {bins} (at most {Config.API_MAX_HISTOGRAM_BINS})")
+        try:
+            return self.db_handler.get_histogram(
+                _param(params, 'metric', default='price'),
+                bins=bins,
+                filters=_parse_filters(params),
+                status=self._status(params)
+            )
+        except ValueError as e:
+            raise ApiError(400, str(e))
+
+    def daily(self, params):
+        df = self.db_handler.get_daily_aggregates(
+            property_type=_param(params, 'property_type'),
+            region=_param(params, 'region'),
+            since=_param(params, 'since'),
+            until=_param(params, 'until')
+        )
+        return {'items': df}
+
+    def daily_histogram(self, params):
+        try:
+            return self.db_handler.get_daily_histogram(
+                _param(params, 'metric', default='price'),
+                snapshot_date=_param(params, 'date'),
+                property_type=_param(params, 'property_type', default=ALL_GROUPS),
+                region=_param(params, 'region', default=ALL_GROUPS)
+            )
+        except ValueError as e:
+            raise ApiError(400, str(e))
+
+    def price_history(self, params):
+        links = params.get('link')
+        df = self.db_handler.get_price_history(
+            links=links,
+            since=_param(params, 'since'),
+            min_snapshots=_param(params, 'min_snapshots', default=1, cast=int)
+        )
+        return {'items': df}
+
+    def handle(self, path, params):
+        """Dispatch a request path to its endpoint"""
+        endpoint = self.routes.get(path.rstrip('/'))
+        if endpoint is None:
+            raise ApiError(404, f"Unknown endpoint: {path}")
+        return endpoint(params)
+
+
+def encode_json(payload):
+    """Serialize a response payload, rendering DataFrames as lists of records"""
+    def default(value):
+        if hasattr(value, 'to_json'):
+            return json.loads(value.to_json(orient='records', force_ascii=False))
+        raise TypeError(f"Cannot serialize {type(value)}")
+    return json.dumps(payload, default=default, ensure_ascii=False).encode('utf-8')
+
+
+def make_handler(api, db_file):
+    class ApiRequestHandler(BaseHTTPRequestHandler):
+        def _db_version(self):
+            """Change marker of the database files, so ETags change whenever data changes"""
+            parts = []
+            for suffix in ('', '-wal'):
+                try:
+                    stat = os.stat(db_file + suffix)
+                    parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+                except FileNotFoundError:
+                    parts.append('-')
+            return '|'.join(parts)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            etag = 'W/"' + hashlib.sha1(f"{self.path}|{self._db_version()}".encode('utf-8')).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+
+            try:
+                body = encode_json(api.handle(url.path, parse_qs(url.query)))
+                status = 200
+            except ApiError as e:
+                body = encode_json({'error': str(e)})
+                status = e.status
+                etag = None
+            except Exception as e:
+                logger.error(f"API error for {self.path}: {str(e)}", exc_info=True)
+                body = encode_json({'error': 'Internal server error'})
+                status = 500
+                etag = None
+
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Vary', 'Accept-Encoding')
+            if etag:
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache')
+            if 'gzip' in self.headers.get('Accept-Encoding', '') and len(body) > Config.API_GZIP_MIN_BYTES:
+                body = gzip.compress(body, compresslevel=6)
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"API {self.address_string()} - {format % args}")
+
+    return ApiRequestHandler
+
+
+def create_server(db_file=None, host=None, port=None):
+    """Create the threaded API server over a listings database"""
+    db_handler = DatabaseHandler(db_file or Config.DEFAULT_DB_FILE)
+    api = ListingsApi(db_handler)
+    return ThreadingHTTPServer(
+        (host or Config.API_HOST, port or Config.API_PORT),
+        make_handler(api, db_handler.filename)
+    )
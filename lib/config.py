@@ -26,9 +26,92 @@ class Config:
         'json_export_enabled': True,
         'json_export_path': os.path.join(DATA_DIR, 'export.json')
     }
+
+    # Columnar Parquet export (requires pyarrow)
+    PARQUET_EXPORT_PATH = os.path.join(DATA_DIR, 'listings.parquet')
+    PARQUET_HOT_EXPORT_PATH = os.path.join(DATA_DIR, 'listings_hot.parquet')
+    PARQUET_ROW_GROUP_SIZE = 50000
+    PARQUET_COMPRESSION = 'zstd'
     
     # Base URL for scraping
     BASE_URL = "https://www.immowelt.de/classified-search?distributionTypes=Buy,Buy_Auction,Compulsory_Auction&estateTypes=House,Apartment&locations=eyJwbGFjZUlkIjoiQUQwOERFNDA0OCIsInJhZGl1cyI6NTAsInBvbHlsaW5lIjoic2VrcUhvZ3JnQGx1QGp2WWRgRHJ0WG5kR25yVnJ-SXhyU3pqTHZ5T2xmTn5rS2BvT3RvRmJjUHZqQWJiUGV6QWRsT3V8RmRiTnd0S3xlTHd8T3J5SXlvU2pgR3dpVmh9Q3FnWGx0QF9nWW10QH1mWWl9Q3FnWGtgR3dpVnN5SXlvU31lTHd8T2ViTnl0S2VsT3V8RmNiUGN6QWNjUHZqQWFvT3JvRm1mTmBsS3tqTHR5T3N-SXpyU29kR25yVmVgRHB0WG11QGp2WSJ9"
+    # Search order used by incremental runs: newest listings first
+    NEWEST_FIRST_ORDER = 'order=DateDesc'
     REQUEST_DELAY = 0.1
     RETRY_ATTEMPTS = 3
-    TIMEOUT = 10
\ No newline at end of file
+    TIMEOUT = 10
+
+    # HTML parser backend for detail pages: auto, selectolax, lxml or html.parser
+    HTML_PARSER = 'auto'
+
+    # Incremental runs stop paginating after this many already stored listings in a row,
+    # a full sweep (which also detects closed listings) is due every FULL_SWEEP_INTERVAL_DAYS
+    INCREMENTAL_STOP_AFTER_KNOWN = 60
+    FULL_SWEEP_INTERVAL_DAYS = 7
+
+    # Listings missing from a full sweep are only closed after a HEAD check confirms it
+    # (404/410 or a redirect to the search); if more than this fraction of the active
+    # listings vanishes at once, the sweep is treated as broken and nothing is closed
+    CLOSE_VERIFY_MAX_FRACTION = 0.2
+    CLOSED_REDIRECT_MARKERS = ('classified-search', '/suche', '/liste')
+
+    # Detail pages per checkpoint flush during a scrape run
+    CHECKPOINT_BATCH_SIZE = 100
+
+    # Rows per chunk when re-normalizing data with --fix-data
+    FIX_DATA_CHUNK_SIZE = 5000
+
+    # On-disk HTTP response cache for detail pages
+    HTTP_CACHE_ENABLED = True
+    HTTP_CACHE_FILE = os.path.join(DATA_DIR, 'http_cache.sqlite')
+    HTTP_CACHE_TTL = 7 * 24 * 3600  # seconds
+    HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024
+    HTTP_CACHE_ACCESS_BATCH = 500  # cache hits recorded in memory before their access times are written
+
+    # Image derivatives rendered from downloaded images
+    THUMBNAIL_SIZE = (320, 240)
+    PREVIEW_MAX_SIZE = (1280, 960)
+    PREVIEW_QUALITY = 75
+
+    # Near-duplicate detection: listings are compared within blocks of rounded coordinates
+    # (3 decimals ~ 100 m) and living space buckets, using MinHash-LSH over word shingles
+    DEDUP_ENABLED = True
+    DEDUP_COORD_DECIMALS = 3
+    DEDUP_AREA_STEP = 5  # m²
+    DEDUP_SHINGLE_SIZE = 2
+    DEDUP_NUM_PERM = 64
+    DEDUP_BANDS = 16
+    DEDUP_THRESHOLD = 0.6
+    DEDUP_SEED = 1
+    # Similar texts only count as one property if the key facts agree as well
+    DEDUP_PRICE_TOLERANCE = 0.05  # relative
+    DEDUP_PLOT_TOLERANCE = 1  # m², portals round plot sizes differently
+    DEDUP_CHUNK_SIZE = 5000
+
+    # Histogram bin widths of the materialized daily aggregates
+    AGGREGATE_BIN_WIDTHS = {
+        'price': 50000,
+        'price_per_sqm': 250,
+        'living_space': 10
+    }
+
+    # Local read-only HTTP API
+    API_HOST = '127.0.0.1'
+    API_PORT = 8050
+    API_DEFAULT_LIMIT = 100
+    API_MAX_LIMIT = 1000
+    API_MAX_HISTOGRAM_BINS = 200
+    API_GZIP_MIN_BYTES = 1024
+
+    # Run metrics: a JSON report per run in LOG_DIR, optionally a Prometheus textfile
+    METRICS_PREFIX = 'immo_'
+    METRICS_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    METRICS_TEXTFILE = None
+
+    # Concurrency and per-host rate limiting
+    DETAIL_WORKERS = 8
+    PAGE_WORKERS = 4
+    IMAGE_WORKERS = 8
+    THUMBNAIL_WORKERS = os.cpu_count() or 2
+    REQUESTS_PER_SECOND = 4.0
+    RATE_LIMIT_BURST = 4
\ No newline at end of file
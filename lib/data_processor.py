@@ -5,10 +5,14 @@ from datetime import datetime
 import time
 import re
 import os
+import sqlite3
 from .logger import get_logger
 from . import parsers
 from .config import Config
+from .database import DatabaseHandler
+from .metrics import get_metrics
 logger = get_logger()
+metrics = get_metrics()
 
 class DataProcessor:
     def __init__(self):
@@ -26,6 +30,8 @@ class DataProcessor:
         logger.info("Processing new data...")
         
         try:
+            start = time.perf_counter()
+
             # Ensure all required columns exist
             self._ensure_columns(df)
             
@@ -35,6 +41,7 @@ class DataProcessor:
             # Add derived columns
             #processed_df = self._add_derived_data(processed_df)
             
+            metrics.record_throughput('processed', len(processed_df), time.perf_counter() - start)
             logger.info("Data processing completed successfully")
             return processed_df
             
@@ -42,6 +49,77 @@ class DataProcessor:
             logger.error(f"Error processing data: {str(e)}")
             raise
 
+    def apply_detail_info(self, df, details_by_link):
+        """Write scraped detail page info back into the DataFrame in one batch"""
+        rows = {}
+        for link, details in details_by_link.items():
+            if not details:
+                continue
+            rows[link] = {
+                'Features': '; '.join(details['features']),
+                'Vollständige_Adresse': details['full_address'],
+                'Latitude': details['latitude'],
+                'Longitude': details['longitude'],
+                'Images': ';'.join(details.get('image_urls', []))
+            }
+
+        if not rows:
+            return df
+
+        details_df = pd.DataFrame.from_dict(rows, orient='index')
+        mask = df['Link'].isin(details_df.index)
+        for col in details_df.columns:
+            df.loc[mask, col] = df.loc[mask, 'Link'].map(details_df[col])
+
+        logger.info(f"Applied detail info to {int(mask.sum())} rows")
+        return df
+
+    def fix_csv_data(self, input_file, output_file, chunksize=None):
+        """Re-normalize a listings SQLite database or legacy CSV chunk by chunk.
+
+        Each chunk runs through the cleaning pipeline and is appended to the
+        output (CSV or SQLite, chosen by extension) before the next one is
+        read, so memory stays bounded by the chunk size.
+        """
+        chunksize = chunksize or Config.FIX_DATA_CHUNK_SIZE
+        logger.info(f"Re-normalizing {input_file} -> {output_file} in chunks of {chunksize}")
+
+        writes_csv = output_file.lower().endswith('.csv')
+        if writes_csv and os.path.exists(output_file):
+            os.remove(output_file)
+        db_handler = None if writes_csv else DatabaseHandler(output_file)
+
+        total = 0
+        for i, chunk in enumerate(self._read_chunks(input_file, chunksize)):
+            chunk = chunk.drop(columns=['id'], errors='ignore')
+            self._ensure_columns(chunk)
+            cleaned = self._clean_data(chunk)
+
+            if writes_csv:
+                for date_col in ['created_date', 'closed_date']:
+                    cleaned[date_col] = cleaned[date_col].dt.strftime('%Y-%m-%d')
+                cleaned.to_csv(output_file, mode='a', header=(i == 0), index=False)
+            elif not db_handler.save_data(cleaned):
+                raise RuntimeError(f"Could not write chunk {i + 1} to {output_file}")
+
+            total += len(cleaned)
+            logger.info(f"Processed chunk {i + 1} ({total} rows so far)")
+
+        logger.info(f"Re-normalized {total} rows into {output_file}")
+        return total
+
+    def _read_chunks(self, input_file, chunksize):
+        """Yield DataFrame chunks from a listings CSV or SQLite database"""
+        if input_file.lower().endswith('.csv'):
+            yield from pd.read_csv(input_file, chunksize=chunksize, dtype={'Preis': object, 'Details': object})
+            return
+
+        conn = sqlite3.connect(input_file)
+        try:
+            yield from pd.read_sql_query("SELECT * FROM listings", conn, chunksize=chunksize)
+        finally:
+            conn.close()
+
     def _ensure_columns(self, df):
         """Ensure all required columns exist in DataFrame"""
         for col in self.required_columns:
@@ -57,23 +135,20 @@ class DataProcessor:
         cleaned_df = df.copy()
         
         # Clean price data
-        cleaned_df['Preis_cleaned'] = cleaned_df['Preis'].apply(parsers.clean_price)
+        cleaned_df['Preis_cleaned'] = parsers.clean_price_series(cleaned_df['Preis'])
         
         # Extract living space
-        cleaned_df['Wohnfläche'] = cleaned_df['Details'].apply(parsers.extract_sqm)
+        cleaned_df['Wohnfläche'] = parsers.extract_sqm_series(cleaned_df['Details'])
         
         # Extract plot size
-        cleaned_df['Grundstücksfläche'] = cleaned_df['Details'].apply(parsers.extract_plot_size)
+        cleaned_df['Grundstücksfläche'] = parsers.extract_plot_size_series(cleaned_df['Details'])
         
         # Extract number of rooms
-        cleaned_df['Zimmer'] = cleaned_df['Details'].apply(parsers.extract_rooms)
+        cleaned_df['Zimmer'] = parsers.extract_rooms_series(cleaned_df['Details'])
         
         # Calculate price per square meter (using living space)
-        cleaned_df['Preis_pro_qm'] = cleaned_df.apply(
-            lambda row: row['Preis_cleaned'] / row['Wohnfläche'] 
-            if pd.notna(row['Preis_cleaned']) and pd.notna(row['Wohnfläche']) and row['Wohnfläche'] > 0 
-            else None,
-            axis=1
+        cleaned_df['Preis_pro_qm'] = parsers.price_per_sqm(
+            cleaned_df['Preis_cleaned'], cleaned_df['Wohnfläche']
         )
         
         # Clean address data
@@ -1,12 +1,363 @@
 import os
+import re
+import gzip
+import time
 import sqlite3
 import pandas as pd
 from datetime import datetime
 import json
+import numpy as np
 from .logger import get_logger
 from .config import Config
+from .parsers import property_type_series, region_series, feature_names
+from .metrics import get_metrics
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
 
 logger = get_logger()
+metrics = get_metrics()
+
+LISTING_COLUMNS = [
+    'Link', 'Preis', 'Beschreibung', 'Details', 'Adresse',
+    'Features', 'Vollständige_Adresse', 'Latitude', 'Longitude',
+    'created_date', 'closed_date', 'Preis_cleaned', 'Wohnfläche',
+    'Grundstücksfläche', 'Zimmer', 'Preis_pro_qm', 'Images',
+    'Vorschaubild', 'content_hash', 'Thumbnails', 'Previews',
+    'property_cluster_id', 'property_type', 'region'
+]
+# Analytics groups derived from Beschreibung and Adresse when a listing is saved
+GROUP_COLUMNS = ['property_type', 'region']
+
+# Columns whose changes are tracked in price_history
+HASH_COLUMNS = ['Preis_cleaned', 'Details', 'Wohnfläche']
+PRICE_COLUMNS = [
+    'Link', 'Preis', 'Details', 'Preis_cleaned', 'Wohnfläche',
+    'Grundstücksfläche', 'Zimmer', 'Preis_pro_qm', 'content_hash'
+]
+
+LISTINGS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS listings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        Link TEXT UNIQUE,
+        Preis TEXT,
+        Beschreibung TEXT,
+        Details TEXT,
+        Adresse TEXT,
+        Features TEXT,
+        Vollständige_Adresse TEXT,
+        Latitude REAL,
+        Longitude REAL,
+        created_date TEXT,
+        closed_date TEXT,
+        Preis_cleaned REAL,
+        Wohnfläche REAL,
+        Grundstücksfläche REAL,
+        Zimmer REAL,
+        Preis_pro_qm REAL,
+        Images TEXT,
+        Vorschaubild TEXT,
+        content_hash TEXT,
+        Thumbnails TEXT,
+        Previews TEXT,
+        property_cluster_id INTEGER,
+        property_type TEXT,
+        region TEXT
+    )
+'''
+
+PRICE_HISTORY_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS price_history (
+        listing_id INTEGER NOT NULL REFERENCES listings(id),
+        scrape_date TEXT NOT NULL,
+        Preis TEXT,
+        Preis_cleaned REAL,
+        Details TEXT,
+        Wohnfläche REAL,
+        content_hash TEXT,
+        PRIMARY KEY (listing_id, scrape_date)
+    )
+'''
+
+RUNS_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS scrape_runs (
+        run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        started_at TEXT,
+        finished_at TEXT,
+        status TEXT,
+        mode TEXT DEFAULT 'full'
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS run_details (
+        run_id INTEGER NOT NULL REFERENCES scrape_runs(run_id),
+        Link TEXT NOT NULL,
+        details TEXT,
+        PRIMARY KEY (run_id, Link)
+    )
+    '''
+]
+
+IMAGES_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS images (
+        sha256 TEXT PRIMARY KEY,
+        path TEXT,
+        size INTEGER,
+        first_seen TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS image_urls (
+        url TEXT PRIMARY KEY,
+        sha256 TEXT NOT NULL REFERENCES images(sha256),
+        fetched_date TEXT
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_image_urls_sha256 ON image_urls(sha256)",
+    '''
+    CREATE TABLE IF NOT EXISTS image_derivatives (
+        sha256 TEXT PRIMARY KEY REFERENCES images(sha256),
+        thumbnail_path TEXT,
+        preview_path TEXT
+    )
+    '''
+]
+
+LISTING_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_listings_price ON listings(Preis_cleaned)",
+    "CREATE INDEX IF NOT EXISTS idx_listings_price_per_sqm ON listings(Preis_pro_qm)",
+    "CREATE INDEX IF NOT EXISTS idx_listings_living_space ON listings(Wohnfläche)",
+    "CREATE INDEX IF NOT EXISTS idx_listings_rooms ON listings(Zimmer)",
+    "CREATE INDEX IF NOT EXISTS idx_listings_plot_size ON listings(Grundstücksfläche)",
+    "CREATE INDEX IF NOT EXISTS idx_listings_created ON listings(created_date)",
+    "CREATE INDEX IF NOT EXISTS idx_listings_closed ON listings(closed_date)",
+    "CREATE INDEX IF NOT EXISTS idx_listings_cluster ON listings(property_cluster_id)",
+    # Most queries only look at active listings
+    "CREATE INDEX IF NOT EXISTS idx_listings_active ON listings(Preis_cleaned, Wohnfläche) WHERE closed_date IS NULL"
+]
+
+# Range filters accepted by query_listings, mapped to their columns
+RANGE_FILTERS = {
+    'price': 'Preis_cleaned',
+    'price_per_sqm': 'Preis_pro_qm',
+    'living_space': 'Wohnfläche',
+    'rooms': 'Zimmer',
+    'plot_size': 'Grundstücksfläche',
+    'created_date': 'created_date',
+    'closed_date': 'closed_date'
+}
+
+SPATIAL_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS listings_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    '''
+    CREATE TRIGGER IF NOT EXISTS listings_rtree_insert AFTER INSERT ON listings
+    WHEN NEW.Latitude IS NOT NULL AND NEW.Longitude IS NOT NULL
+    BEGIN
+        INSERT OR REPLACE INTO listings_rtree VALUES (NEW.id, NEW.Latitude, NEW.Latitude, NEW.Longitude, NEW.Longitude);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS listings_rtree_update AFTER UPDATE OF Latitude, Longitude ON listings
+    BEGIN
+        DELETE FROM listings_rtree WHERE id = OLD.id;
+        INSERT INTO listings_rtree
+        SELECT NEW.id, NEW.Latitude, NEW.Latitude, NEW.Longitude, NEW.Longitude
+        WHERE NEW.Latitude IS NOT NULL AND NEW.Longitude IS NOT NULL;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS listings_rtree_delete AFTER DELETE ON listings
+    BEGIN
+        DELETE FROM listings_rtree WHERE id = OLD.id;
+    END
+    '''
+]
+
+# MinHash signatures of listings, grouped by their geo/size block for near-duplicate detection
+SIGNATURES_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS listing_signatures (
+        listing_id INTEGER PRIMARY KEY REFERENCES listings(id),
+        block_key TEXT NOT NULL,
+        signature BLOB NOT NULL
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_listing_signatures_block ON listing_signatures(block_key)"
+]
+
+# Normalized feature vocabulary; listing_features is keyed by feature first, so each
+# feature's primary key range is the posting list of the listings that have it
+FEATURES_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS features (
+        feature_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE COLLATE NOCASE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS listing_features (
+        feature_id INTEGER NOT NULL REFERENCES features(feature_id),
+        listing_id INTEGER NOT NULL REFERENCES listings(id),
+        PRIMARY KEY (feature_id, listing_id)
+    ) WITHOUT ROWID
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_listing_features_listing ON listing_features(listing_id)"
+]
+
+# Daily analytics materialized per property type and region; 'all' rows are rollups
+AGGREGATES_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS daily_aggregates (
+        snapshot_date TEXT NOT NULL,
+        property_type TEXT NOT NULL,
+        region TEXT NOT NULL,
+        total_count INTEGER,
+        active_count INTEGER,
+        new_count INTEGER,
+        closed_count INTEGER,
+        price_min REAL,
+        price_q25 REAL,
+        price_median REAL,
+        price_q75 REAL,
+        price_max REAL,
+        price_mean REAL,
+        price_per_sqm_q25 REAL,
+        price_per_sqm_median REAL,
+        price_per_sqm_q75 REAL,
+        price_per_sqm_mean REAL,
+        living_space_median REAL,
+        living_space_mean REAL,
+        PRIMARY KEY (snapshot_date, property_type, region)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS daily_histograms (
+        snapshot_date TEXT NOT NULL,
+        property_type TEXT NOT NULL,
+        region TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        bin_start REAL NOT NULL,
+        count INTEGER,
+        PRIMARY KEY (snapshot_date, property_type, region, metric, bin_start)
+    )
+    '''
+]
+ALL_GROUPS = 'all'
+AGGREGATE_METRICS = {
+    'price': 'Preis_cleaned',
+    'price_per_sqm': 'Preis_pro_qm',
+    'living_space': 'Wohnfläche'
+}
+
+# Columnar export: typed listing columns and the narrow file dashboards load
+NUMERIC_COLUMNS = [
+    'Latitude', 'Longitude', 'Preis_cleaned', 'Wohnfläche',
+    'Grundstücksfläche', 'Zimmer', 'Preis_pro_qm'
+]
+INTEGER_COLUMNS = ['id', 'property_cluster_id']
+DATE_COLUMNS = ['created_date', 'closed_date']
+HOT_COLUMNS = [
+    'id', 'Link', 'Preis', 'Beschreibung', 'Details', 'Adresse',
+    'Latitude', 'Longitude', 'created_date', 'closed_date', 'Preis_cleaned',
+    'Wohnfläche', 'Grundstücksfläche', 'Zimmer', 'Preis_pro_qm', 'Vorschaubild'
+]
+
+# Full-text index over the free-text columns, an external-content FTS5 table kept in sync by triggers.
+# Text is indexed and searched with German umlauts and ß spelled out ("Einbaukueche" finds
+# "Einbauküche", "Strasse" finds "Straße"); remove_diacritics handles the remaining accents
+FTS_COLUMNS = ['Features', 'Beschreibung', 'Adresse', 'Vollständige_Adresse']
+FTS_WEIGHTS = [2.0, 1.0, 1.0, 1.0]
+FTS_TOKEN_PATTERN = re.compile(r'\w+')
+GERMAN_FOLDING = {'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'Ä': 'Ae', 'Ö': 'Oe', 'Ü': 'Ue', 'ß': 'ss', 'ẞ': 'SS'}
+
+
+def fold_german(text):
+    """Spell out umlauts and ß, e.g. 'Einbauküche' -> 'Einbaukueche'"""
+    return text.translate(str.maketrans(GERMAN_FOLDING))
+
+
+def _fold_german_sql(expression):
+    """SQL expression applying fold_german to a text expression"""
+    for char, replacement in GERMAN_FOLDING.items():
+        expression = f"replace({expression}, '{char}', '{replacement}')"
+    return expression
+
+
+_fts_columns = ', '.join(f'"{col}"' for col in FTS_COLUMNS)
+_fts_new = ', '.join(_fold_german_sql(f'NEW."{col}"') for col in FTS_COLUMNS)
+_fts_old = ', '.join(_fold_german_sql(f'OLD."{col}"') for col in FTS_COLUMNS)
+_fts_source = ', '.join(f'{_fold_german_sql(col)} AS "{col}"' for col in FTS_COLUMNS)
+FULLTEXT_SCHEMA = [
+    # The index reads the folded text through this view, so 'rebuild' and 'integrity-check' agree with the triggers
+    f"CREATE VIEW IF NOT EXISTS listings_fts_source AS SELECT id, {_fts_source} FROM listings",
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS listings_fts USING fts5(
+        {_fts_columns},
+        content='listings_fts_source', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS listings_fts_insert AFTER INSERT ON listings
+    BEGIN
+        INSERT INTO listings_fts (rowid, {_fts_columns}) VALUES (NEW.id, {_fts_new});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS listings_fts_delete AFTER DELETE ON listings
+    BEGIN
+        INSERT INTO listings_fts (listings_fts, rowid, {_fts_columns}) VALUES ('delete', OLD.id, {_fts_old});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS listings_fts_update AFTER UPDATE OF {_fts_columns} ON listings
+    BEGIN
+        INSERT INTO listings_fts (listings_fts, rowid, {_fts_columns}) VALUES ('delete', OLD.id, {_fts_old});
+        INSERT INTO listings_fts (rowid, {_fts_columns}) VALUES (NEW.id, {_fts_new});
+    END
+    """
+]
+
+EARTH_RADIUS_KM = 6371.0088
+BATCH_SIZE = 500
+
+
+def compute_content_hash(df):
+    """Hash the tracked columns of each row so unchanged listings can be skipped cheaply"""
+    key = pd.Series('', index=df.index, dtype='string')
+    for i, col in enumerate(HASH_COLUMNS):
+        values = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if col != 'Details':
+            values = pd.to_numeric(values, errors='coerce').astype('float64')
+        key = key + ('|' if i else '') + values.astype('string').fillna('')
+    return pd.util.hash_pandas_object(key, index=False).map('{:016x}'.format)
+
+
+def arrow_schema(columns):
+    """Arrow schema of the exported listing columns"""
+    fields = []
+    for col in columns:
+        if col in INTEGER_COLUMNS:
+            fields.append(pa.field(col, pa.int64()))
+        elif col in NUMERIC_COLUMNS:
+            fields.append(pa.field(col, pa.float64()))
+        elif col in DATE_COLUMNS:
+            fields.append(pa.field(col, pa.date32()))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometers, vectorized over NumPy arrays"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
 
 class DatabaseHandler:
     def __init__(self, filename=None):
@@ -20,6 +371,8 @@ class DatabaseHandler:
             self.filename = os.path.join(Config.DATA_DIR, 'listings.sqlite')
             
         self.current_date = datetime.now().strftime('%Y-%m-%d')
+        self.has_spatial_index = False
+        self.has_fulltext_index = False
         self._ensure_directories()
         self._initialize_database()
 
@@ -35,44 +388,296 @@ class DatabaseHandler:
             
         logger.debug(f"Database will be stored at: {self.filename}")
 
+    def _connect(self):
+        """Open a connection in WAL mode"""
+        conn = sqlite3.connect(self.filename)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
     def _initialize_database(self):
         """Initialize SQLite database with schema"""
         try:
-            with sqlite3.connect(self.filename) as conn:
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS listings (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        Link TEXT UNIQUE,
-                        Preis TEXT,
-                        Beschreibung TEXT,
-                        Details TEXT,
-                        Adresse TEXT,
-                        Features TEXT,
-                        Vollständige_Adresse TEXT,
-                        Latitude REAL,
-                        Longitude REAL,
-                        created_date TEXT,
-                        closed_date TEXT,
-                        Preis_cleaned REAL,
-                        Wohnfläche REAL,
-                        Grundstücksfläche REAL,
-                        Zimmer REAL,
-                        Preis_pro_qm REAL,
-                        Images TEXT,
-                        Vorschaubild TEXT
-                    )
-                ''')
+            with self._connect() as conn:
+                conn.execute(LISTINGS_SCHEMA)
+                self._migrate_schema(conn)
+                conn.execute(PRICE_HISTORY_SCHEMA)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_price_history_date ON price_history(scrape_date)")
+                self._backfill_content_hashes(conn)
+                for statement in RUNS_SCHEMA + IMAGES_SCHEMA + AGGREGATES_SCHEMA + SIGNATURES_SCHEMA:
+                    conn.execute(statement)
+                if 'mode' not in self._table_columns(conn, 'scrape_runs'):
+                    conn.execute("ALTER TABLE scrape_runs ADD COLUMN mode TEXT DEFAULT 'full'")
+                self._create_indexes(conn)
+                self._create_spatial_index(conn)
+                self._create_fulltext_index(conn)
+                self._create_feature_index(conn)
                 conn.commit()
         except Exception as e:
             logger.error(f"Error initializing database: {str(e)}")
             raise
 
+    def _migrate_schema(self, conn):
+        """Restore the listings schema on databases written by to_sql(if_exists='replace')"""
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(listings)")]
+        if 'id' in columns:
+            for col in LISTING_COLUMNS:
+                if col not in columns:
+                    conn.execute(f'ALTER TABLE listings ADD COLUMN "{col}"')
+            if any(col not in columns for col in GROUP_COLUMNS):
+                self._backfill_groups(conn)
+            return
+
+        logger.info("Migrating listings table to keyed schema...")
+        conn.execute("ALTER TABLE listings RENAME TO listings_legacy")
+        conn.execute(LISTINGS_SCHEMA)
+        shared = ', '.join(f'"{col}"' for col in LISTING_COLUMNS if col in columns)
+        conn.execute(f"""
+            INSERT OR IGNORE INTO listings ({shared})
+            SELECT {shared} FROM listings_legacy ORDER BY rowid
+        """)
+        conn.execute("DROP TABLE listings_legacy")
+        self._backfill_groups(conn)
+
+    def _backfill_groups(self, conn):
+        """Derive the analytics groups of listings stored before they were kept on the row"""
+        logger.info("Backfilling property types and regions...")
+        last_id = 0
+        while True:
+            chunk = pd.read_sql_query(
+                "SELECT id, Beschreibung, Adresse FROM listings WHERE id > ? ORDER BY id LIMIT ?",
+                conn, params=[last_id, BATCH_SIZE * 10]
+            )
+            if chunk.empty:
+                break
+            conn.executemany(
+                "UPDATE listings SET property_type = ?, region = ? WHERE id = ?",
+                zip(property_type_series(chunk['Beschreibung']), region_series(chunk['Adresse']), chunk['id'].tolist())
+            )
+            last_id = int(chunk['id'].iloc[-1])
+
+    def _create_indexes(self, conn):
+        """Create the query indexes and gather planner statistics the first time"""
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        for statement in LISTING_INDEXES:
+            conn.execute(statement)
+        if 'idx_listings_active' not in existing:
+            conn.execute("ANALYZE")
+
+    def _create_spatial_index(self, conn):
+        """Create the R*Tree over listing coordinates, kept in sync by triggers"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'listings_rtree'"
+        ).fetchone() is not None
+        try:
+            for statement in SPATIAL_SCHEMA:
+                conn.execute(statement)
+        except sqlite3.OperationalError as e:
+            # SQLite builds without the R*Tree module fall back to plain range scans
+            logger.warning(f"Spatial index unavailable: {str(e)}")
+            self.has_spatial_index = False
+            return
+
+        self.has_spatial_index = True
+        if not exists:
+            conn.execute("""
+                INSERT OR REPLACE INTO listings_rtree
+                SELECT id, Latitude, Latitude, Longitude, Longitude FROM listings
+                WHERE Latitude IS NOT NULL AND Longitude IS NOT NULL
+            """)
+
+    def _create_fulltext_index(self, conn):
+        """Create the FTS5 index over the free-text columns, kept in sync by triggers"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'listings_fts'"
+        ).fetchone() is not None
+        try:
+            for statement in FULLTEXT_SCHEMA:
+                conn.execute(statement)
+        except sqlite3.OperationalError as e:
+            # SQLite builds without FTS5 fall back to LIKE scans
+            logger.warning(f"Full-text index unavailable: {str(e)}")
+            self.has_fulltext_index = False
+            return
+
+        self.has_fulltext_index = True
+        if not exists:
+            logger.info("Building full-text index...")
+            conn.execute("INSERT INTO listings_fts (listings_fts) VALUES ('rebuild')")
+
+    def _create_feature_index(self, conn):
+        """Create the feature vocabulary and inverted index, filling it from stored listings once"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'listing_features'"
+        ).fetchone() is not None
+        for statement in FEATURES_SCHEMA:
+            conn.execute(statement)
+        if not exists:
+            logger.info("Building feature index...")
+            last_id = 0
+            while True:
+                chunk = pd.read_sql_query(
+                    "SELECT id, Link, Features FROM listings WHERE id > ? AND Features IS NOT NULL ORDER BY id LIMIT ?",
+                    conn, params=[last_id, BATCH_SIZE * 10]
+                )
+                if chunk.empty:
+                    break
+                self._sync_features(conn, chunk)
+                last_id = int(chunk['id'].iloc[-1])
+
+    def _sync_features(self, conn, df):
+        """Replace the indexed features of the listings in df with their current Features"""
+        rows = [
+            (link, features) for link, features in zip(df['Link'], df['Features'])
+            if isinstance(link, str)
+        ]
+        self._fill_temp_table(conn, 'feature_links', ['Link', 'Features'], rows)
+        listings = conn.execute("""
+            SELECT l.id, t.Features FROM feature_links t JOIN listings l ON l.Link = t.Link
+        """).fetchall()
+        conn.execute("""
+            DELETE FROM listing_features
+            WHERE listing_id IN (SELECT l.id FROM feature_links t JOIN listings l ON l.Link = t.Link)
+        """)
+
+        pairs = [(listing_id, name) for listing_id, features in listings for name in feature_names(features)]
+        if not pairs:
+            return 0
+        conn.executemany(
+            "INSERT OR IGNORE INTO features (name) VALUES (?)",
+            [(name,) for name in dict.fromkeys(name for _, name in pairs)]
+        )
+        vocabulary = {name.lower(): feature_id for feature_id, name in conn.execute("SELECT feature_id, name FROM features")}
+        links = [(vocabulary[name.lower()], listing_id) for listing_id, name in pairs]
+        for start in range(0, len(links), BATCH_SIZE):
+            conn.executemany("INSERT OR IGNORE INTO listing_features VALUES (?, ?)", links[start:start + BATCH_SIZE])
+        return len(links)
+
+    def _backfill_content_hashes(self, conn):
+        """Hash listings stored before change tracking and seed their first price snapshot"""
+        if conn.execute("SELECT 1 FROM listings WHERE content_hash IS NULL LIMIT 1").fetchone() is None:
+            return
+
+        logger.info("Backfilling content hashes and initial price snapshots...")
+        query = f"SELECT id, {', '.join(HASH_COLUMNS)} FROM listings WHERE content_hash IS NULL"
+        for chunk in pd.read_sql_query(query, conn, chunksize=BATCH_SIZE * 10):
+            rows = list(zip(compute_content_hash(chunk), chunk['id'].tolist()))
+            conn.executemany("UPDATE listings SET content_hash = ? WHERE id = ?", rows)
+
+        conn.execute("""
+            INSERT OR IGNORE INTO price_history
+                (listing_id, scrape_date, Preis, Preis_cleaned, Details, Wohnfläche, content_hash)
+            SELECT l.id, COALESCE(l.created_date, ?), l.Preis, l.Preis_cleaned, l.Details, l.Wohnfläche, l.content_hash
+            FROM listings l
+            WHERE NOT EXISTS (SELECT 1 FROM price_history p WHERE p.listing_id = l.id)
+        """, (self.current_date,))
+
+    def _fill_temp_table(self, conn, table, columns, rows):
+        """(Re)create a temp table keyed by its first column and fill it in batches"""
+        conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+        column_defs = ', '.join(
+            f'"{col}" TEXT PRIMARY KEY' if i == 0 else f'"{col}" TEXT'
+            for i, col in enumerate(columns)
+        )
+        conn.execute(f"CREATE TEMP TABLE {table} ({column_defs})")
+        placeholders = ', '.join('?' for _ in columns)
+        for start in range(0, len(rows), BATCH_SIZE):
+            conn.executemany(f"INSERT OR IGNORE INTO {table} VALUES ({placeholders})", rows[start:start + BATCH_SIZE])
+
+    def _prepare_rows(self, df, columns):
+        """Convert DataFrame rows into tuples of SQLite-compatible values"""
+        frame = df[columns].copy()
+        for date_col in ['created_date', 'closed_date']:
+            if date_col in frame.columns:
+                frame[date_col] = pd.to_datetime(frame[date_col], errors='coerce').dt.strftime('%Y-%m-%d')
+        frame = frame.astype(object).where(frame.notna(), None)
+        return list(frame.itertuples(index=False, name=None))
+
+    def _upsert_listings(self, conn, df):
+        """Insert new listings and update existing ones by Link in batches"""
+        if df.empty or 'Link' not in df.columns:
+            return 0
+
+        df = df[df['Link'].notna()]
+        if all(col in df.columns for col in HASH_COLUMNS):
+            df = df.assign(content_hash=compute_content_hash(df))
+        if 'Beschreibung' in df.columns:
+            df = df.assign(property_type=property_type_series(df['Beschreibung']))
+        if 'Adresse' in df.columns:
+            df = df.assign(region=region_series(df['Adresse']))
+        columns = [col for col in LISTING_COLUMNS if col in df.columns]
+        rows = self._prepare_rows(df, columns)
+
+        quoted = ', '.join(f'"{col}"' for col in columns)
+        placeholders = ', '.join('?' for _ in columns)
+        updates = ', '.join(
+            # Keep the first-seen date of a listing
+            f'"{col}" = COALESCE(listings."{col}", excluded."{col}")' if col == 'created_date'
+            else f'"{col}" = excluded."{col}"'
+            for col in columns if col != 'Link'
+        )
+        query = f"INSERT INTO listings ({quoted}) VALUES ({placeholders})"
+        if updates:
+            query += f" ON CONFLICT(Link) DO UPDATE SET {updates}"
+        else:
+            query += " ON CONFLICT(Link) DO NOTHING"
+
+        for start in range(0, len(rows), BATCH_SIZE):
+            conn.executemany(query, rows[start:start + BATCH_SIZE])
+        if 'Features' in columns:
+            self._sync_features(conn, df)
+        return len(rows)
+
+    def _close_listings(self, conn, links, closed_date):
+        """Set closed_date on still-active listings"""
+        rows = [(closed_date, link) for link in links]
+        for start in range(0, len(rows), BATCH_SIZE):
+            conn.executemany(
+                "UPDATE listings SET closed_date = ? WHERE Link = ? AND closed_date IS NULL",
+                rows[start:start + BATCH_SIZE]
+            )
+        return len(rows)
+
+    def _snapshot_listings(self, conn, links_table, scrape_date):
+        """Copy the current price columns of the listings in a temp table into price_history"""
+        conn.execute(f"""
+            INSERT OR REPLACE INTO price_history
+                (listing_id, scrape_date, Preis, Preis_cleaned, Details, Wohnfläche, content_hash)
+            SELECT l.id, ?, l.Preis, l.Preis_cleaned, l.Details, l.Wohnfläche, l.content_hash
+            FROM {links_table} t JOIN listings l ON l.Link = t.Link
+        """, (scrape_date,))
+
+    def _record_price_changes(self, conn, unchanged_df):
+        """Update listings whose tracked columns changed and snapshot them"""
+        if unchanged_df.empty:
+            return 0
+
+        unchanged_df = unchanged_df[unchanged_df['Link'].notna()].drop_duplicates('Link')
+        hashes = compute_content_hash(unchanged_df)
+        self._fill_temp_table(conn, 'current_hashes', ['Link', 'content_hash'],
+                              list(zip(unchanged_df['Link'], hashes)))
+        changed_links = {row[0] for row in conn.execute("""
+            SELECT c.Link FROM current_hashes c
+            JOIN listings l ON l.Link = c.Link
+            WHERE l.content_hash IS NOT c.content_hash
+        """)}
+        conn.execute("DROP TABLE current_hashes")
+        if not changed_links:
+            return 0
+
+        changed_df = unchanged_df[unchanged_df['Link'].isin(changed_links)]
+        self._upsert_listings(conn, changed_df[[col for col in PRICE_COLUMNS if col in changed_df.columns]])
+        self._fill_temp_table(conn, 'changed_links', ['Link'], [(link,) for link in changed_links])
+        self._snapshot_listings(conn, 'changed_links', self.current_date)
+        conn.execute("DROP TABLE changed_links")
+        return len(changed_links)
+
     def load_existing_data(self):
         """Load existing data from SQLite database"""
         try:
             logger.info(f"Loading existing data from {self.filename}")
             
-            with sqlite3.connect(self.filename) as conn:
+            with self._connect() as conn:
                 query = "SELECT * FROM listings"
                 df = pd.read_sql_query(query, conn)
                 
@@ -95,34 +700,235 @@ class DatabaseHandler:
             ])
 
     def save_data(self, df, is_checkpoint=False):
-        """Save DataFrame to SQLite database"""
+        """Upsert DataFrame rows into SQLite database"""
         try:
-            # Ensure dates are in consistent format before saving
-            for date_col in ['created_date', 'closed_date']:
-                if date_col in df.columns and not df[date_col].empty:
-                    df[date_col] = pd.to_datetime(df[date_col]).dt.strftime('%Y-%m-%d')
-
-            with sqlite3.connect(self.filename) as conn:
-                # Save to main database
-                df.to_sql('listings', conn, if_exists='replace', index=False)
+            start = time.perf_counter()
+            with self._connect() as conn:
+                # Save to main database in a single transaction
+                saved = self._upsert_listings(conn, df)
+            metrics.record_throughput('db_written', saved, time.perf_counter() - start)
                 
-                if is_checkpoint:
-                    # Create checkpoint copy
-                    checkpoint_file = os.path.join(
-                        Config.CHECKPOINT_DIR,
-                        f"checkpoint_{os.path.basename(self.filename)}_{self.current_date}.sqlite"
-                    )
-                    import shutil
-                    shutil.copy2(self.filename, checkpoint_file)
-                    logger.info(f"Saved checkpoint to {checkpoint_file}")
+            if is_checkpoint:
+                # Create checkpoint copy
+                checkpoint_file = os.path.join(
+                    Config.CHECKPOINT_DIR,
+                    f"checkpoint_{os.path.basename(self.filename)}_{self.current_date}.sqlite"
+                )
+                self._copy_database(checkpoint_file)
+                logger.info(f"Saved checkpoint to {checkpoint_file}")
 
-            logger.info(f"Saved {len(df)} records to {self.filename}")
+            logger.info(f"Saved {saved} records to {self.filename}")
             return True
             
         except Exception as e:
             logger.error(f"Error saving data: {str(e)}")
             return False
 
+    def save_changes(self, new_df, comparison_results):
+        """Persist only the changes of a run: insert new listings, record price changes and close vanished ones"""
+        try:
+            new_entries = new_df[new_df['Link'].isin(comparison_results['new_listings'])].copy()
+            new_entries['created_date'] = self.current_date
+
+            unchanged_entries = new_df[new_df['Link'].isin(comparison_results['unchanged_listings'])]
+
+            start = time.perf_counter()
+            with self._connect() as conn:
+                inserted = self._upsert_listings(conn, new_entries)
+                self._fill_temp_table(conn, 'new_links', ['Link'], [(link,) for link in comparison_results['new_listings']])
+                self._snapshot_listings(conn, 'new_links', self.current_date)
+                conn.execute("DROP TABLE new_links")
+                changed = self._record_price_changes(conn, unchanged_entries)
+                closed = self._close_listings(conn, comparison_results['closed_listings'], self.current_date)
+            metrics.record_throughput('db_written', inserted + changed + closed, time.perf_counter() - start)
+
+            logger.info(f"Saved {inserted} new, {changed} changed and {closed} closed listings to {self.filename}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error saving changes: {str(e)}")
+            return False
+
+    def _copy_database(self, target_file):
+        """Copy the database through the SQLite backup API so WAL contents are included"""
+        with self._connect() as source, sqlite3.connect(target_file) as target:
+            source.backup(target)
+
+    def start_run(self, resume=False, mode='full'):
+        """Start a scrape run (full sweep or incremental), or continue the last unfinished one when resuming"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT run_id FROM scrape_runs WHERE status = 'running' ORDER BY run_id DESC LIMIT 1"
+            ).fetchone()
+            if resume and row:
+                logger.info(f"Resuming scrape run {row[0]}")
+                return row[0]
+
+            # Unfinished runs that are not resumed are abandoned with their progress
+            conn.execute("DELETE FROM run_details WHERE run_id IN (SELECT run_id FROM scrape_runs WHERE status = 'running')")
+            conn.execute("UPDATE scrape_runs SET status = 'abandoned' WHERE status = 'running'")
+            cursor = conn.execute(
+                "INSERT INTO scrape_runs (started_at, status, mode) VALUES (?, 'running', ?)",
+                (datetime.now().isoformat(timespec='seconds'), mode)
+            )
+            logger.info(f"Started {mode} scrape run {cursor.lastrowid}")
+            return cursor.lastrowid
+
+    def last_full_sweep(self):
+        """Start time of the last completed full sweep, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(started_at) FROM scrape_runs WHERE status = 'completed' AND mode = 'full'"
+            ).fetchone()
+        return datetime.fromisoformat(row[0]) if row[0] else None
+
+    def get_known_links(self, links):
+        """Return the subset of links that are already stored"""
+        with self._connect() as conn:
+            self._fill_temp_table(conn, 'lookup_links', ['Link'], [(link,) for link in links if isinstance(link, str)])
+            known = {row[0] for row in conn.execute(
+                "SELECT c.Link FROM lookup_links c JOIN listings l ON l.Link = c.Link"
+            )}
+            conn.execute("DROP TABLE lookup_links")
+        return known
+
+    def save_run_details(self, run_id, details_by_link):
+        """Checkpoint scraped detail pages of a run"""
+        rows = [
+            (run_id, link, json.dumps(details))
+            for link, details in details_by_link.items() if details
+        ]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO run_details (run_id, Link, details) VALUES (?, ?, ?)", rows)
+        logger.info(f"Checkpointed {len(rows)} detail pages for run {run_id}")
+
+    def load_run_details(self, run_id):
+        """Load the detail pages already scraped in a run"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT Link, details FROM run_details WHERE run_id = ?", (run_id,))
+            return {link: json.loads(details) for link, details in rows}
+
+    def finish_run(self, run_id, status='completed'):
+        """Mark a run as finished and drop its checkpointed progress"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE scrape_runs SET status = ?, finished_at = ? WHERE run_id = ?",
+                (status, datetime.now().isoformat(timespec='seconds'), run_id)
+            )
+            conn.execute("DELETE FROM run_details WHERE run_id = ?", (run_id,))
+
+    def get_image_hashes(self, urls):
+        """Return {url: {'sha256', 'path'}} for image URLs that were already downloaded"""
+        with self._connect() as conn:
+            self._fill_temp_table(conn, 'lookup_urls', ['url'], [(url,) for url in urls])
+            rows = conn.execute("""
+                SELECT u.url, i.sha256, i.path
+                FROM lookup_urls t
+                JOIN image_urls u ON u.url = t.url
+                JOIN images i ON i.sha256 = u.sha256
+            """).fetchall()
+            conn.execute("DROP TABLE lookup_urls")
+        return {url: {'sha256': sha256, 'path': path} for url, sha256, path in rows}
+
+    def save_images(self, images):
+        """Record downloaded images and their URL -> content hash mapping"""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO images (sha256, path, size, first_seen) VALUES (?, ?, ?, ?)",
+                [(image['sha256'], image['path'], image['size'], self.current_date) for image in images]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO image_urls (url, sha256, fetched_date) VALUES (?, ?, ?)",
+                [(image['url'], image['sha256'], self.current_date) for image in images]
+            )
+
+    def get_images_without_derivatives(self):
+        """Return (sha256, path) of downloaded images that have no thumbnail/preview yet"""
+        with self._connect() as conn:
+            return conn.execute("""
+                SELECT i.sha256, i.path FROM images i
+                WHERE NOT EXISTS (SELECT 1 FROM image_derivatives d WHERE d.sha256 = i.sha256)
+            """).fetchall()
+
+    def save_image_derivatives(self, records):
+        """Record (sha256, thumbnail_path, preview_path) of rendered derivatives"""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO image_derivatives (sha256, thumbnail_path, preview_path) VALUES (?, ?, ?)",
+                records
+            )
+
+    def update_listing_derivatives(self, links=None):
+        """Fill Thumbnails/Previews with derivative paths aligned to the URLs in Images"""
+        with self._connect() as conn:
+            derivatives = {
+                url: (thumbnail_path, preview_path)
+                for url, thumbnail_path, preview_path in conn.execute("""
+                    SELECT u.url, d.thumbnail_path, d.preview_path
+                    FROM image_urls u JOIN image_derivatives d ON d.sha256 = u.sha256
+                """)
+            }
+            query = "SELECT Link, Images FROM listings WHERE Images IS NOT NULL AND Images != ''"
+            if links is not None:
+                self._fill_temp_table(conn, 'derivative_links', ['Link'], [(link,) for link in links])
+                query += " AND Link IN (SELECT Link FROM derivative_links)"
+
+            rows = []
+            for link, images in conn.execute(query).fetchall():
+                urls = [url.strip() for url in images.split(';') if url.strip()]
+                paths = [derivatives.get(url, ('', '')) for url in urls]
+                if any(thumbnail for thumbnail, _ in paths):
+                    rows.append((
+                        ';'.join(thumbnail for thumbnail, _ in paths),
+                        ';'.join(preview for _, preview in paths),
+                        link
+                    ))
+            conn.executemany("UPDATE listings SET Thumbnails = ?, Previews = ? WHERE Link = ?", rows)
+
+        logger.info(f"Updated derivative paths of {len(rows)} listings")
+        return len(rows)
+
+    def get_unsigned_listings(self, limit):
+        """Listings with coordinates and living space that have no MinHash signature yet"""
+        with self._connect() as conn:
+            return pd.read_sql_query("""
+                SELECT l.id, l.Beschreibung, l.Details, l.Features, l.Latitude, l.Longitude, l.Wohnfläche,
+                       l.Zimmer, l.Grundstücksfläche, l.Preis_cleaned
+                FROM listings l
+                WHERE l.Latitude IS NOT NULL AND l.Longitude IS NOT NULL AND l.Wohnfläche IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM listing_signatures s WHERE s.listing_id = l.id)
+                ORDER BY l.id
+                LIMIT ?
+            """, conn, params=(limit,))
+
+    def get_block_signatures(self, block_keys):
+        """Stored signatures, cluster ids and key facts of all listings in the given blocks"""
+        with self._connect() as conn:
+            self._fill_temp_table(conn, 'lookup_blocks', ['block_key'], [(key,) for key in set(block_keys)])
+            rows = conn.execute("""
+                SELECT s.listing_id, s.block_key, s.signature, COALESCE(l.property_cluster_id, l.id),
+                       l.Zimmer, l.Grundstücksfläche, l.Preis_cleaned
+                FROM listing_signatures s
+                JOIN lookup_blocks b ON b.block_key = s.block_key
+                JOIN listings l ON l.id = s.listing_id
+            """).fetchall()
+            conn.execute("DROP TABLE lookup_blocks")
+        return rows
+
+    def save_clusters(self, signatures, assignments, merges):
+        """Store new signatures, assign cluster ids and relabel merged clusters in one transaction.
+
+        signatures: (listing_id, block_key, signature) tuples
+        assignments: (cluster_id, listing_id) tuples for newly signed listings
+        merges: (cluster_id, old_cluster_id) tuples for existing clusters joined together
+        """
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO listing_signatures VALUES (?, ?, ?)", signatures)
+            conn.executemany("UPDATE listings SET property_cluster_id = ? WHERE id = ?", assignments)
+            conn.executemany(
+                "UPDATE listings SET property_cluster_id = ? WHERE property_cluster_id = ?", merges
+            )
+
     def compare_listings(self, existing_df, new_df):
         """Compare existing and new listings to find changes"""
         if 'Link' not in existing_df.columns:
@@ -148,6 +954,44 @@ class DatabaseHandler:
             'unchanged_listings': unchanged_listings
         }
 
+    def compare_listings_sql(self, current_links):
+        """Compare scraped links against stored listings inside SQLite.
+
+        Streams the links into a temp table and diffs with indexed joins, so
+        the stored history never has to be loaded. Returns the same dict shape
+        as compare_listings; closed_listings only contains listings that are
+        still active, since already closed ones need no update.
+        """
+        with self._connect() as conn:
+            rows = [(link,) for link in current_links if isinstance(link, str)]
+            self._fill_temp_table(conn, 'current_links', ['Link'], rows)
+
+            new_listings = {row[0] for row in conn.execute("""
+                SELECT c.Link FROM current_links c
+                WHERE NOT EXISTS (SELECT 1 FROM listings l WHERE l.Link = c.Link)
+            """)}
+            closed_listings = {row[0] for row in conn.execute("""
+                SELECT l.Link FROM listings l
+                WHERE l.closed_date IS NULL
+                  AND NOT EXISTS (SELECT 1 FROM current_links c WHERE c.Link = l.Link)
+            """)}
+            unchanged_listings = {row[0] for row in conn.execute("""
+                SELECT c.Link FROM current_links c
+                JOIN listings l ON l.Link = c.Link
+            """)}
+            conn.execute("DROP TABLE current_links")
+
+        logger.info(f"Comparison results:")
+        logger.info(f"- New listings: {len(new_listings)}")
+        logger.info(f"- Closed listings: {len(closed_listings)}")
+        logger.info(f"- Unchanged listings: {len(unchanged_listings)}")
+
+        return {
+            'new_listings': new_listings,
+            'closed_listings': closed_listings,
+            'unchanged_listings': unchanged_listings
+        }
+
     def update_database(self, existing_df, new_df, comparison_results):
         """Update database with new listings and mark closed ones"""
         if existing_df.empty:
@@ -171,8 +1015,190 @@ class DatabaseHandler:
 
         return merged_df
 
-    def get_statistics(self, df):
-        """Generate statistics about the database"""
+    def _aggregate_frame(self, df):
+        """Add the 'all' rollups of the type and region keys to grouped listings"""
+        return pd.concat([
+            df,
+            df.assign(region=ALL_GROUPS),
+            df.assign(property_type=ALL_GROUPS),
+            df.assign(property_type=ALL_GROUPS, region=ALL_GROUPS)
+        ], ignore_index=True)
+
+    def _aggregate_counts(self, conn, snapshot_date):
+        """Counts, extremes and means per type and region, with the 'all' rollups.
+
+        SQLite groups the listings in one pass; the rollups only combine the
+        per-group rows, so means are carried as sums and counts until the end.
+        """
+        price, per_sqm, space = AGGREGATE_METRICS['price'], AGGREGATE_METRICS['price_per_sqm'], AGGREGATE_METRICS['living_space']
+        groups = pd.read_sql_query(f"""
+            SELECT COALESCE(property_type, 'Unbekannt') AS property_type,
+                   COALESCE(region, 'Unbekannt') AS region,
+                   COUNT(*) AS total_count,
+                   COALESCE(SUM(active), 0) AS active_count,
+                   COALESCE(SUM(created_date = :day), 0) AS new_count,
+                   COALESCE(SUM(closed_date = :day), 0) AS closed_count,
+                   MIN(CASE WHEN active THEN "{price}" END) AS price_min,
+                   MAX(CASE WHEN active THEN "{price}" END) AS price_max,
+                   TOTAL(CASE WHEN active THEN "{price}" END) AS price_sum,
+                   COUNT(CASE WHEN active THEN "{price}" END) AS price_n,
+                   TOTAL(CASE WHEN active THEN "{per_sqm}" END) AS price_per_sqm_sum,
+                   COUNT(CASE WHEN active THEN "{per_sqm}" END) AS price_per_sqm_n,
+                   TOTAL(CASE WHEN active THEN "{space}" END) AS living_space_sum,
+                   COUNT(CASE WHEN active THEN "{space}" END) AS living_space_n
+            FROM (
+                SELECT *, closed_date IS NULL OR closed_date > :day AS active
+                FROM listings
+                WHERE created_date IS NULL OR created_date <= :day
+            )
+            GROUP BY 1, 2
+        """, conn, params={'day': snapshot_date})
+
+        grouped = self._aggregate_frame(groups).groupby(['property_type', 'region'])
+        summary = grouped.sum(numeric_only=True)
+        summary['price_min'] = grouped['price_min'].min()
+        summary['price_max'] = grouped['price_max'].max()
+        for metric in ['price', 'price_per_sqm', 'living_space']:
+            counts = summary.pop(f'{metric}_n')
+            summary[f'{metric}_mean'] = summary.pop(f'{metric}_sum') / counts.where(counts > 0)
+        return summary
+
+    def refresh_daily_aggregates(self, snapshot_date=None):
+        """Materialize the analytics of one day (default today), replacing only that day's rows"""
+        snapshot_date = snapshot_date or self.current_date
+        keys = ['property_type', 'region']
+        try:
+            with self._connect() as conn:
+                summary = self._aggregate_counts(conn, snapshot_date)
+
+                # SQLite has no percentiles, so quantiles and histograms read the numeric columns of active listings
+                columns = ', '.join(f'"{col}"' for col in AGGREGATE_METRICS.values())
+                active = self._aggregate_frame(pd.read_sql_query(f"""
+                    SELECT COALESCE(property_type, 'Unbekannt') AS property_type,
+                           COALESCE(region, 'Unbekannt') AS region, {columns}
+                    FROM listings
+                    WHERE (created_date IS NULL OR created_date <= ?)
+                      AND (closed_date IS NULL OR closed_date > ?)
+                """, conn, params=(snapshot_date, snapshot_date),
+                    dtype={col: 'float64' for col in AGGREGATE_METRICS.values()}))
+
+                quantiles = active.groupby(keys)[list(AGGREGATE_METRICS.values())].quantile([0.25, 0.5, 0.75]).unstack()
+                price, per_sqm, space = AGGREGATE_METRICS['price'], AGGREGATE_METRICS['price_per_sqm'], AGGREGATE_METRICS['living_space']
+                summary = summary.join(pd.DataFrame({
+                    'price_q25': quantiles[(price, 0.25)],
+                    'price_median': quantiles[(price, 0.5)],
+                    'price_q75': quantiles[(price, 0.75)],
+                    'price_per_sqm_q25': quantiles[(per_sqm, 0.25)],
+                    'price_per_sqm_median': quantiles[(per_sqm, 0.5)],
+                    'price_per_sqm_q75': quantiles[(per_sqm, 0.75)],
+                    'living_space_median': quantiles[(space, 0.5)]
+                }))
+                summary = summary.reset_index()
+                summary.insert(0, 'snapshot_date', snapshot_date)
+
+                histograms = []
+                for metric, column in AGGREGATE_METRICS.items():
+                    width = Config.AGGREGATE_BIN_WIDTHS[metric]
+                    values = active[keys + [column]].dropna(subset=[column])
+                    values = values.assign(bin_start=np.floor(values[column] / width) * width)
+                    counts = values.groupby(keys + ['bin_start']).size().rename('count').reset_index()
+                    counts.insert(2, 'metric', metric)
+                    histograms.append(counts)
+                histograms = pd.concat(histograms, ignore_index=True)
+                histograms.insert(0, 'snapshot_date', snapshot_date)
+
+                conn.execute("DELETE FROM daily_aggregates WHERE snapshot_date = ?", (snapshot_date,))
+                conn.execute("DELETE FROM daily_histograms WHERE snapshot_date = ?", (snapshot_date,))
+                for table, frame in [('daily_aggregates', summary), ('daily_histograms', histograms)]:
+                    columns = ', '.join(f'"{col}"' for col in frame.columns)
+                    placeholders = ', '.join('?' for _ in frame.columns)
+                    conn.executemany(
+                        f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                        self._prepare_rows(frame, list(frame.columns))
+                    )
+
+            logger.info(f"Materialized {len(summary)} aggregate and {len(histograms)} histogram rows for {snapshot_date}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error materializing daily aggregates: {str(e)}")
+            return False
+
+    def get_daily_aggregates(self, property_type=None, region=None, since=None, until=None):
+        """Read materialized daily aggregates, optionally for one type/region and a date range"""
+        conditions = []
+        params = []
+        for column, value in [('property_type', property_type), ('region', region)]:
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            conditions.append("snapshot_date >= ?")
+            params.append(since)
+        if until:
+            conditions.append("snapshot_date <= ?")
+            params.append(until)
+        query = "SELECT * FROM daily_aggregates"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY snapshot_date, property_type, region"
+        with self._connect() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+    def get_daily_histogram(self, metric, snapshot_date=None, property_type=ALL_GROUPS, region=ALL_GROUPS):
+        """Read a materialized histogram, by default of the latest materialized day"""
+        if metric not in AGGREGATE_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        width = Config.AGGREGATE_BIN_WIDTHS[metric]
+        with self._connect() as conn:
+            if snapshot_date is None:
+                snapshot_date = conn.execute("SELECT MAX(snapshot_date) FROM daily_histograms").fetchone()[0]
+            rows = conn.execute("""
+                SELECT bin_start, count FROM daily_histograms
+                WHERE snapshot_date = ? AND property_type = ? AND region = ? AND metric = ?
+                ORDER BY bin_start
+            """, (snapshot_date, property_type, region, metric)).fetchall()
+        return [
+            {'bin_start': bin_start, 'bin_end': bin_start + width, 'count': count}
+            for bin_start, count in rows
+        ]
+
+    def get_statistics(self, df=None):
+        """Generate statistics about the database, from today's materialized aggregates if present"""
+        if df is None:
+            with self._connect() as conn:
+                row = conn.execute("""
+                    SELECT total_count, active_count, new_count, closed_count,
+                           price_mean, price_median, living_space_mean, living_space_median,
+                           price_per_sqm_mean, price_per_sqm_median
+                    FROM daily_aggregates
+                    WHERE snapshot_date = ? AND property_type = ? AND region = ?
+                """, (self.current_date, ALL_GROUPS, ALL_GROUPS)).fetchone()
+                if row is not None:
+                    total, active, new, closed, *numbers = row
+                    unique = conn.execute(
+                        "SELECT COUNT(DISTINCT COALESCE(property_cluster_id, id)) FROM listings WHERE closed_date IS NULL"
+                    ).fetchone()[0]
+                    stats = {
+                        "Total listings": total,
+                        "Active listings": active,
+                        "Closed listings": total - active,
+                        "New listings today": new,
+                        "Listings closed today": closed,
+                        "Unique active properties": unique
+                    }
+                    for i, col in enumerate(['Preis_cleaned', 'Wohnfläche', 'Preis_pro_qm']):
+                        stats[f"Average {col}"] = np.nan if numbers[2 * i] is None else numbers[2 * i]
+                        stats[f"Median {col}"] = np.nan if numbers[2 * i + 1] is None else numbers[2 * i + 1]
+                    return stats
+
+                # Nothing materialized yet, only load the columns the statistics need
+                df = pd.read_sql_query("""
+                    SELECT COALESCE(property_cluster_id, id) AS property_id,
+                           created_date, closed_date, Preis_cleaned, Wohnfläche, Preis_pro_qm
+                    FROM listings
+                """, conn)
+
         stats = {
             "Total listings": len(df),
             "Active listings": len(df[df['closed_date'].isna()]),
@@ -181,12 +1207,15 @@ class DatabaseHandler:
             "Listings closed today": len(df[df['closed_date'] == self.current_date])
         }
         
-        # Add numeric statistics if data exists
+        # Price and size statistics describe the active listings
+        active = df[df['closed_date'].isna()]
+        if 'property_id' in active.columns:
+            stats["Unique active properties"] = active['property_id'].nunique()
         numeric_cols = ['Preis_cleaned', 'Wohnfläche', 'Preis_pro_qm']
         for col in numeric_cols:
-            if col in df.columns and not df[col].empty:
-                stats[f"Average {col}"] = df[col].mean()
-                stats[f"Median {col}"] = df[col].median()
+            if col in active.columns and not active[col].empty:
+                stats[f"Average {col}"] = active[col].mean()
+                stats[f"Median {col}"] = active[col].median()
         
         return stats
 
@@ -198,45 +1227,442 @@ class DatabaseHandler:
                 f"backup_{os.path.basename(self.filename)}_{self.current_date}.sqlite"
             )
             
-            import shutil
-            shutil.copy2(self.filename, backup_file)
+            self._copy_database(backup_file)
             logger.info(f"Created backup at {backup_file}")
             return True
         except Exception as e:
             logger.error(f"Error creating backup: {str(e)}")
             return False
 
-    def export_to_json(self, output_file=None):
-        """Export database to JSON format"""
+    def export_to_parquet(self, output_file=None, hot_output_file=None, row_group_size=None):
+        """Export listings to Parquet in streamed row groups, plus a hot-columns file without Features/Images"""
+        if pa is None:
+            logger.error("pyarrow is not installed, skipping Parquet export")
+            return False
+
+        output_file = output_file or Config.PARQUET_EXPORT_PATH
+        hot_output_file = hot_output_file or Config.PARQUET_HOT_EXPORT_PATH
+        row_group_size = row_group_size or Config.PARQUET_ROW_GROUP_SIZE
+        options = {'compression': Config.PARQUET_COMPRESSION, 'use_dictionary': True}
+        try:
+            with self._connect() as conn:
+                columns = ['id'] + [col for col in LISTING_COLUMNS if col in self._table_columns(conn)]
+                hot_columns = [col for col in HOT_COLUMNS if col in columns]
+                schema = arrow_schema(columns)
+                hot_schema = arrow_schema(hot_columns)
+
+                # Write to temp files so readers never load a half-written export
+                writer = pq.ParquetWriter(f"{output_file}.tmp", schema, **options)
+                hot_writer = pq.ParquetWriter(f"{hot_output_file}.tmp", hot_schema, **options)
+                rows = 0
+                try:
+                    projection = ', '.join(f'"{col}"' for col in columns)
+                    query = f"SELECT {projection} FROM listings ORDER BY id"
+                    for chunk in pd.read_sql_query(query, conn, chunksize=row_group_size):
+                        for col in NUMERIC_COLUMNS:
+                            if col in chunk.columns:
+                                chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+                        for col in INTEGER_COLUMNS:
+                            if col in chunk.columns:
+                                chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype('Int64')
+                        for col in DATE_COLUMNS:
+                            if col in chunk.columns:
+                                chunk[col] = pd.to_datetime(chunk[col], errors='coerce').dt.date
+                        table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                        writer.write_table(table)
+                        hot_writer.write_table(table.select(hot_columns))
+                        rows += len(chunk)
+                finally:
+                    writer.close()
+                    hot_writer.close()
+
+            os.replace(f"{output_file}.tmp", output_file)
+            os.replace(f"{hot_output_file}.tmp", hot_output_file)
+            logger.info(f"Exported {rows} listings to Parquet: {output_file} (hot columns: {hot_output_file})")
+            return True
+        except Exception as e:
+            logger.error(f"Error exporting to Parquet: {str(e)}")
+            for tmp_file in (f"{output_file}.tmp", f"{hot_output_file}.tmp"):
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
+            return False
+
+    def export_to_json(self, output_file=None, columns=None, since=None, ndjson=False, compress=None):
+        """Stream listings to a JSON array or NDJSON file without loading the table into memory.
+
+        With `since`, only listings created, closed or re-priced on or after
+        that date are exported. Output is gzipped when `compress` is set or
+        the file name ends in .gz.
+        """
         try:
             if output_file is None:
+                extension = 'ndjson' if ndjson else 'json'
                 output_file = os.path.join(
                     Config.DATA_DIR,
-                    f"listings_{self.current_date}.json"
+                    f"listings_{self.current_date}.{extension}"
                 )
-            
-            with sqlite3.connect(self.filename) as conn:
-                df = pd.read_sql_query("SELECT * FROM listings", conn)
-                
-            # Convert DataFrame to JSON
-            json_data = df.to_json(output_file, orient='records', date_format='iso')
-            logger.info(f"Exported database to JSON: {output_file}")
+            if compress is None:
+                compress = output_file.endswith('.gz')
+
+            with self._connect() as conn:
+                available = self._table_columns(conn)
+                columns = columns or ['id'] + [col for col in LISTING_COLUMNS if col in available]
+                unknown = [col for col in columns if col not in available]
+                if unknown:
+                    raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+                projection = ', '.join(f'"{col}"' for col in columns)
+                query = f"SELECT {projection} FROM listings"
+                params = []
+                if since:
+                    query += """
+                        WHERE created_date >= ? OR closed_date >= ?
+                           OR id IN (SELECT listing_id FROM price_history WHERE scrape_date >= ?)
+                    """
+                    params = [since, since, since]
+                query += " ORDER BY id"
+
+                opener = gzip.open if compress else open
+                rows = 0
+                with opener(f"{output_file}.tmp", 'wt', encoding='utf-8') as f:
+                    cursor = conn.execute(query, params)
+                    if not ndjson:
+                        f.write('[')
+                    while True:
+                        batch = cursor.fetchmany(BATCH_SIZE)
+                        if not batch:
+                            break
+                        for row in batch:
+                            record = json.dumps(dict(zip(columns, row)), ensure_ascii=False)
+                            if ndjson:
+                                f.write(record + '\n')
+                            else:
+                                f.write((',\n' if rows else '\n') + record)
+                            rows += 1
+                    if not ndjson:
+                        f.write('\n]\n')
+
+            os.replace(f"{output_file}.tmp", output_file)
+            logger.info(f"Exported {rows} listings to JSON: {output_file}")
             return True
         except Exception as e:
             logger.error(f"Error exporting to JSON: {str(e)}")
             return False
 
-    def query_listings(self, conditions=None, limit=None):
-        """Query listings with optional conditions"""
+    def _table_columns(self, conn, table='listings'):
+        """Return the column names of a table"""
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+    def _build_filters(self, filters=None, status=None):
+        """Translate range filters and a status into a parameterized WHERE clause"""
+        conditions = []
+        params = []
+        for name, bounds in (filters or {}).items():
+            if name not in RANGE_FILTERS:
+                raise ValueError(f"Unknown filter: {name}")
+            low, high = bounds
+            column = RANGE_FILTERS[name]
+            if low is not None:
+                conditions.append(f'"{column}" >= ?')
+                params.append(low)
+            if high is not None:
+                conditions.append(f'"{column}" <= ?')
+                params.append(high)
+
+        if status == 'active':
+            conditions.append("closed_date IS NULL")
+        elif status == 'closed':
+            conditions.append("closed_date IS NOT NULL")
+        elif status not in (None, 'all'):
+            raise ValueError(f"Unknown status: {status}")
+
+        return conditions, params
+
+    def query_listings(self, filters=None, columns=None, status=None, order_by=None, limit=None, offset=None):
+        """Query listings with parameterized range filters, column projection and pagination.
+
+        filters maps names from RANGE_FILTERS to (min, max) tuples, either bound
+        may be None. status is 'active', 'closed' or None for all listings.
+        order_by is a column name, prefixed with '-' for descending order.
+        """
         try:
-            query = "SELECT * FROM listings"
-            if conditions:
-                query += f" WHERE {conditions}"
-            if limit:
-                query += f" LIMIT {limit}"
-                
-            with sqlite3.connect(self.filename) as conn:
-                return pd.read_sql_query(query, conn)
-        except Exception as e:
+            with self._connect() as conn:
+                table_columns = self._table_columns(conn)
+                columns = columns or table_columns
+                unknown = [col for col in columns if col not in table_columns]
+                if unknown:
+                    raise ValueError(f"Unknown columns: {unknown}")
+
+                conditions, params = self._build_filters(filters, status)
+                projection = ', '.join(f'"{col}"' for col in columns)
+                query = f"SELECT {projection} FROM listings"
+                if conditions:
+                    query += " WHERE " + " AND ".join(conditions)
+
+                order_column = (order_by or 'id').lstrip('-')
+                if order_column not in table_columns:
+                    raise ValueError(f"Unknown order column: {order_column}")
+                direction = 'DESC' if order_by and order_by.startswith('-') else 'ASC'
+                # Tie-break on id so pages are stable
+                query += f' ORDER BY "{order_column}" {direction}, id {direction}'
+
+                if limit is not None:
+                    query += " LIMIT ? OFFSET ?"
+                    params += [int(limit), int(offset or 0)]
+
+                return pd.read_sql_query(query, conn, params=params)
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            # Invalid arguments raise ValueError, only database failures are swallowed
             logger.error(f"Error querying database: {str(e)}")
             return pd.DataFrame()
+
+    def search_listings(self, text, columns=None, filters=None, status=None, limit=50, offset=0):
+        """Full-text search over features, descriptions and addresses, best matches first.
+
+        Every word of `text` must match, as a prefix, in any of FTS_COLUMNS.
+        Results can be narrowed with the same filters and status as query_listings.
+        """
+        terms = FTS_TOKEN_PATTERN.findall(fold_german(text or ''))
+        if not terms:
+            return pd.DataFrame()
+        try:
+            with self._connect() as conn:
+                table_columns = self._table_columns(conn)
+                columns = columns or table_columns
+                unknown = [col for col in columns if col not in table_columns]
+                if unknown:
+                    raise ValueError(f"Unknown columns: {unknown}")
+
+                conditions, params = self._build_filters(filters, status)
+                projection = ', '.join(f'l."{col}"' for col in columns)
+                if self.has_fulltext_index:
+                    match = ' '.join(f'"{term}"*' for term in terms)
+                    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+                    query = f"""
+                        SELECT {projection}, f.rank AS search_rank
+                        FROM (
+                            SELECT rowid AS listing_id, bm25(listings_fts, {weights}) AS rank
+                            FROM listings_fts WHERE listings_fts MATCH ?
+                        ) f
+                        JOIN listings l ON l.id = f.listing_id
+                    """
+                    params = [match] + params
+                else:
+                    # Without FTS5 every term has to be found by a scan
+                    text_columns = " || ' ' || ".join(_fold_german_sql(f'COALESCE("{col}", \'\')') for col in FTS_COLUMNS)
+                    for term in terms:
+                        conditions.append(f"({text_columns}) LIKE ?")
+                        params.append(f"%{term}%")
+                    query = f"SELECT {projection}, 0 AS search_rank FROM listings l"
+                if conditions:
+                    query += " WHERE " + " AND ".join(conditions)
+                query += " ORDER BY search_rank, l.id LIMIT ? OFFSET ?"
+                params += [int(limit), int(offset or 0)]
+                return pd.read_sql_query(query, conn, params=params)
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            logger.error(f"Error searching listings: {str(e)}")
+            return pd.DataFrame()
+
+    def _feature_set_query(self, conn, include=None, exclude=None):
+        """SQL selecting the ids of listings with all `include` and none of the `exclude` features.
+
+        Each feature's posting list comes from the listing_features primary key;
+        INTERSECT and EXCEPT combine them without touching the Features text.
+        Returns None if an included feature is unknown (nothing can match).
+        """
+        def feature_id(name):
+            row = conn.execute("SELECT feature_id FROM features WHERE name = ?", (name,)).fetchone()
+            return row[0] if row else None
+
+        parts = []
+        params = []
+        for name in include or []:
+            fid = feature_id(name)
+            if fid is None:
+                return None, []
+            parts.append(("INTERSECT" if parts else "", "SELECT listing_id FROM listing_features WHERE feature_id = ?"))
+            params.append(fid)
+        if not parts:
+            parts.append(("", "SELECT id FROM listings"))
+        for name in exclude or []:
+            fid = feature_id(name)
+            if fid is not None:
+                parts.append(("EXCEPT", "SELECT listing_id FROM listing_features WHERE feature_id = ?"))
+                params.append(fid)
+        return " ".join(f"{operator} {select}".strip() for operator, select in parts), params
+
+    def query_by_features(self, include=None, exclude=None, columns=None, filters=None, status=None, limit=None, offset=None):
+        """Listings that have every `include` feature and none of the `exclude` features"""
+        try:
+            with self._connect() as conn:
+                table_columns = self._table_columns(conn)
+                columns = columns or table_columns
+                unknown = [col for col in columns if col not in table_columns]
+                if unknown:
+                    raise ValueError(f"Unknown columns: {unknown}")
+
+                id_query, params = self._feature_set_query(conn, include, exclude)
+                if id_query is None:
+                    return pd.DataFrame(columns=columns)
+                conditions, filter_params = self._build_filters(filters, status)
+                conditions.insert(0, f"id IN ({id_query})")
+                projection = ', '.join(f'"{col}"' for col in columns)
+                query = f"SELECT {projection} FROM listings WHERE " + " AND ".join(conditions) + " ORDER BY id"
+                params += filter_params
+                if limit is not None:
+                    query += " LIMIT ? OFFSET ?"
+                    params += [int(limit), int(offset or 0)]
+                return pd.read_sql_query(query, conn, params=params)
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            logger.error(f"Error querying listings by features: {str(e)}")
+            return pd.DataFrame()
+
+    def get_feature_counts(self, include=None, exclude=None, filters=None, status=None, top=None):
+        """Facet counts: how many of the matching listings have each feature, in one query"""
+        with self._connect() as conn:
+            id_query, params = self._feature_set_query(conn, include, exclude)
+            if id_query is None:
+                return []
+            conditions, filter_params = self._build_filters(filters, status)
+            conditions.insert(0, f"id IN ({id_query})")
+            query = f"""
+                SELECT f.name, COUNT(*) AS count
+                FROM listing_features lf
+                JOIN features f ON f.feature_id = lf.feature_id
+                WHERE lf.listing_id IN (SELECT id FROM listings WHERE {" AND ".join(conditions)})
+                GROUP BY lf.feature_id
+                ORDER BY count DESC, f.name
+            """
+            params += filter_params
+            if top:
+                query += " LIMIT ?"
+                params.append(int(top))
+            return [{'feature': name, 'count': count} for name, count in conn.execute(query, params)]
+
+    def count_listings(self, filters=None, status=None):
+        """Count listings matching the same filters as query_listings"""
+        conditions, params = self._build_filters(filters, status)
+        query = "SELECT COUNT(*) FROM listings"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchone()[0]
+
+    def get_histogram(self, metric, bins=20, filters=None, status=None):
+        """Bin a numeric RANGE_FILTERS metric into equal-width buckets inside SQLite"""
+        if metric not in RANGE_FILTERS or metric.endswith('_date'):
+            raise ValueError(f"Unknown metric: {metric}")
+        if bins < 1:
+            raise ValueError(f"Invalid number of bins: {bins}")
+        column = RANGE_FILTERS[metric]
+        conditions, params = self._build_filters(filters, status)
+        conditions.append(f'"{column}" IS NOT NULL')
+        where = " WHERE " + " AND ".join(conditions)
+
+        with self._connect() as conn:
+            low, high = conn.execute(f'SELECT MIN("{column}"), MAX("{column}") FROM listings{where}', params).fetchone()
+            if low is None:
+                return []
+            width = (high - low) / bins or 1
+            rows = conn.execute(f"""
+                SELECT MIN(CAST(("{column}" - ?) / ? AS INTEGER), ?) AS bin, COUNT(*)
+                FROM listings{where}
+                GROUP BY bin ORDER BY bin
+            """, [low, width, bins - 1] + params).fetchall()
+
+        return [
+            {'bin_start': low + b * width, 'bin_end': low + (b + 1) * width, 'count': count}
+            for b, count in rows
+        ]
+
+    def query_bbox(self, min_lat, min_lon, max_lat, max_lon, columns=None, status=None):
+        """Return listings inside a bounding box, pruned through the spatial index"""
+        try:
+            with self._connect() as conn:
+                table_columns = self._table_columns(conn)
+                columns = list(columns or table_columns)
+                for required in ['Latitude', 'Longitude']:
+                    if required not in columns:
+                        columns.append(required)
+                unknown = [col for col in columns if col not in table_columns]
+                if unknown:
+                    raise ValueError(f"Unknown columns: {unknown}")
+
+                conditions, params = self._build_filters(status=status)
+                conditions = [f"l.{condition}" for condition in conditions]
+                projection = ', '.join(f'l."{col}"' for col in columns)
+                box = [min_lat, max_lat, min_lon, max_lon]
+                if self.has_spatial_index:
+                    # Overlap rather than containment: the R*Tree rounds its 32-bit
+                    # boxes outward, so points on the edge poke past the query box
+                    query = f"""
+                        SELECT {projection} FROM listings_rtree r
+                        JOIN listings l ON l.id = r.id
+                        WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_lon >= ? AND r.min_lon <= ?
+                    """
+                else:
+                    query = f"""
+                        SELECT {projection} FROM listings l
+                        WHERE l.Latitude >= ? AND l.Latitude <= ? AND l.Longitude >= ? AND l.Longitude <= ?
+                    """
+                if conditions:
+                    query += " AND " + " AND ".join(conditions)
+                df = pd.read_sql_query(query, conn, params=box + params)
+
+            # The R*Tree stores 32-bit floats, so re-check the exact box
+            inside = df['Latitude'].between(min_lat, max_lat) & df['Longitude'].between(min_lon, max_lon)
+            return df[inside].reset_index(drop=True)
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            logger.error(f"Error querying bounding box: {str(e)}")
+            return pd.DataFrame()
+
+    def query_radius(self, latitude, longitude, radius_km, columns=None, status=None):
+        """Return listings within radius_km of a point, sorted by distance"""
+        # Bounding box of the circle prunes candidates before the exact haversine check
+        lat_delta = np.degrees(radius_km / EARTH_RADIUS_KM)
+        lon_delta = lat_delta / max(np.cos(np.radians(latitude)), 1e-12)
+        df = self.query_bbox(
+            latitude - lat_delta, longitude - lon_delta,
+            latitude + lat_delta, longitude + lon_delta,
+            columns=columns, status=status
+        )
+        if df.empty:
+            return df
+
+        df['distance_km'] = haversine_km(latitude, longitude, df['Latitude'].to_numpy(), df['Longitude'].to_numpy())
+        return df[df['distance_km'] <= radius_km].sort_values('distance_km').reset_index(drop=True)
+
+    def get_price_history(self, links=None, since=None, min_snapshots=1):
+        """Return price trajectories ordered by listing and scrape date.
+
+        Optionally restricted to a set of links, to snapshots since a date and
+        to listings with at least `min_snapshots` snapshots (2 = price changed).
+        """
+        try:
+            query = """
+                SELECT p.listing_id, l.Link, p.scrape_date, p.Preis, p.Preis_cleaned,
+                       p.Details, p.Wohnfläche
+                FROM price_history p
+                JOIN listings l ON l.id = p.listing_id
+            """
+            conditions = []
+            params = []
+            with self._connect() as conn:
+                if links is not None:
+                    self._fill_temp_table(conn, 'history_links', ['Link'], [(link,) for link in links])
+                    conditions.append("l.Link IN (SELECT Link FROM history_links)")
+                if since:
+                    conditions.append("p.scrape_date >= ?")
+                    params.append(since)
+                if min_snapshots > 1:
+                    conditions.append("""p.listing_id IN (
+                        SELECT listing_id FROM price_history GROUP BY listing_id HAVING COUNT(*) >= ?
+                    )""")
+                    params.append(min_snapshots)
+                if conditions:
+                    query += " WHERE " + " AND ".join(conditions)
+                query += " ORDER BY p.listing_id, p.scrape_date"
+                return pd.read_sql_query(query, conn, params=params)
+        except Exception as e:
+            logger.error(f"Error querying price history: {str(e)}")
+            return pd.DataFrame()
@@ -0,0 +1,196 @@
+# lib/dedup.py
+import re
+import zlib
+from collections import defaultdict
+import numpy as np
+from .logger import get_logger
+from .config import Config
+
+logger = get_logger()
+
+TOKEN_PATTERN = re.compile(r'\w+')
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def shingles(text, size):
+    """Set of word n-gram hashes of a text"""
+    words = TOKEN_PATTERN.findall(text.lower())
+    if len(words) < size:
+        grams = [' '.join(words)] if words else []
+    else:
+        grams = [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return {zlib.crc32(gram.encode('utf-8')) for gram in grams}
+
+
+def listing_text(row):
+    """Text compared between listings: headline, key facts and features"""
+    return ' '.join(str(row[col]) for col in ('Beschreibung', 'Details', 'Features') if isinstance(row[col], str))
+
+
+def _fact(value):
+    """A key fact as float, None if unknown"""
+    if value is None or value != value:
+        return None
+    return float(value)
+
+
+class PropertyDeduplicator:
+    def __init__(self, db_handler, num_perm=None, bands=None, threshold=None):
+        """Cluster listings of the same property with MinHash-LSH inside geo/size blocks"""
+        self.db_handler = db_handler
+        self.num_perm = num_perm or Config.DEDUP_NUM_PERM
+        self.bands = bands or Config.DEDUP_BANDS
+        self.rows_per_band = self.num_perm // self.bands
+        self.threshold = threshold or Config.DEDUP_THRESHOLD
+        # The permutations must be identical across runs, stored signatures depend on them
+        rng = np.random.default_rng(Config.DEDUP_SEED)
+        self.a = rng.integers(1, MERSENNE_PRIME, self.num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, self.num_perm, dtype=np.uint64)
+
+    def block_key(self, latitude, longitude, living_space):
+        """Blocking key: rounded coordinates and living space bucket"""
+        decimals = Config.DEDUP_COORD_DECIMALS
+        return f"{latitude:.{decimals}f}:{longitude:.{decimals}f}:{int(living_space // Config.DEDUP_AREA_STEP)}"
+
+    def signature(self, text):
+        """MinHash signature of the text's shingles as uint32 values"""
+        hashes = np.fromiter(shingles(text, Config.DEDUP_SHINGLE_SIZE), dtype=np.uint64)
+        if hashes.size == 0:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        # (a * x + b) mod p, truncated to 32 bits; uint64 arithmetic wraps like the reference implementation
+        values = (np.outer(hashes, self.a) + self.b) % np.uint64(MERSENNE_PRIME) & MAX_HASH
+        return values.min(axis=0).astype(np.uint32)
+
+    def similarity(self, left, right):
+        """Estimated Jaccard similarity of two signatures"""
+        return float(np.mean(left == right))
+
+    def same_facts(self, left, right):
+        """Whether two listings' (rooms, plot size, price) allow them to be the same property.
+
+        Rooms must be equal, plot size and price are only compared when both listings state them.
+        """
+        left_rooms, left_plot, left_price = left
+        right_rooms, right_plot, right_price = right
+        if left_rooms != right_rooms:
+            return False
+        if left_plot and right_plot and abs(left_plot - right_plot) > Config.DEDUP_PLOT_TOLERANCE:
+            return False
+        if left_price and right_price and abs(left_price - right_price) > Config.DEDUP_PRICE_TOLERANCE * max(left_price, right_price):
+            return False
+        return True
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            start = band * self.rows_per_band
+            yield band, signature[start:start + self.rows_per_band].tobytes()
+
+    def _cluster_chunk(self, df):
+        """Sign a chunk of listings and link them to similar listings of the same blocks"""
+        df = df.assign(block_key=[
+            self.block_key(lat, lon, area)
+            for lat, lon, area in zip(df['Latitude'], df['Longitude'], df['Wohnfläche'])
+        ])
+        new = {}
+        facts = {}
+        for row in df.itertuples(index=False):
+            new[int(row.id)] = (row.block_key, self.signature(listing_text(row._asdict())))
+            facts[int(row.id)] = (_fact(row.Zimmer), _fact(row.Grundstücksfläche), _fact(row.Preis_cleaned))
+
+        # Existing listings of the touched blocks take part with their current cluster ids
+        clusters = {}
+        signatures = {}
+        for listing_id, block, blob, cluster_id, *listing_facts in self.db_handler.get_block_signatures(df['block_key']):
+            signatures[listing_id] = (block, np.frombuffer(blob, dtype=np.uint32))
+            clusters[listing_id] = cluster_id
+            facts.setdefault(listing_id, tuple(_fact(value) for value in listing_facts))
+        signatures.update(new)
+
+        # Union-find over candidate pairs that share an LSH band bucket within a block
+        parent = {listing_id: listing_id for listing_id in signatures}
+        component_members = {listing_id: [listing_id] for listing_id in signatures}
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        def union(left_root, right_root):
+            parent[left_root] = right_root
+            component_members[right_root].extend(component_members.pop(left_root))
+
+        # Stored clusters start out joined, so new listings are checked against the whole property
+        cluster_roots = {}
+        for listing_id, cluster_id in clusters.items():
+            if cluster_id in cluster_roots:
+                union(find(listing_id), find(cluster_roots[cluster_id]))
+            else:
+                cluster_roots[cluster_id] = listing_id
+
+        buckets = defaultdict(list)
+        for listing_id, (block, signature) in signatures.items():
+            for band, key in self._band_keys(signature):
+                buckets[(block, band, key)].append(listing_id)
+
+        checked = set()
+        for bucket in buckets.values():
+            for i, left in enumerate(bucket):
+                for right in bucket[i + 1:]:
+                    if left not in new and right not in new:
+                        continue
+                    pair = (min(left, right), max(left, right))
+                    if pair in checked:
+                        continue
+                    checked.add(pair)
+                    left_root, right_root = find(left), find(right)
+                    if left_root == right_root:
+                        continue
+                    if self.similarity(signatures[left][1], signatures[right][1]) < self.threshold:
+                        continue
+                    # Every pair of the joined component must agree, so tolerances cannot chain
+                    if all(
+                        self.same_facts(facts[a], facts[b])
+                        for a in component_members[left_root] for b in component_members[right_root]
+                    ):
+                        union(left_root, right_root)
+
+        # A component keeps the smallest cluster id among its members
+        components = defaultdict(list)
+        for listing_id in signatures:
+            components[find(listing_id)].append(listing_id)
+
+        existing_clusters = set(clusters.values())
+        assignments = []
+        merges = []
+        for members in components.values():
+            cluster_ids = {clusters.get(listing_id, listing_id) for listing_id in members}
+            cluster_id = min(cluster_ids)
+            assignments.extend((cluster_id, listing_id) for listing_id in members if listing_id in new)
+            merges.extend((cluster_id, old) for old in cluster_ids if old != cluster_id and old in existing_clusters)
+
+        self.db_handler.save_clusters(
+            [(listing_id, block, signature.tobytes()) for listing_id, (block, signature) in new.items()],
+            assignments,
+            merges
+        )
+        return sum(1 for cluster_id, listing_id in assignments if cluster_id != listing_id), len(merges)
+
+    def run(self, chunk_size=None):
+        """Cluster every listing that has not been signed yet, chunk by chunk"""
+        chunk_size = chunk_size or Config.DEDUP_CHUNK_SIZE
+        processed = 0
+        duplicates = 0
+        merged = 0
+        while True:
+            df = self.db_handler.get_unsigned_listings(chunk_size)
+            if df.empty:
+                break
+            chunk_duplicates, chunk_merged = self._cluster_chunk(df)
+            processed += len(df)
+            duplicates += chunk_duplicates
+            merged += chunk_merged
+
+        logger.info(f"Deduplicated {processed} listings: {duplicates} joined an existing property, {merged} clusters merged")
+        return processed
@@ -0,0 +1,321 @@
+# lib/detail_extractor.py
+import json
+import re
+import urllib.parse
+from urllib.parse import unquote
+from bs4 import BeautifulSoup, SoupStrainer
+from .logger import get_logger
+from .config import Config
+
+try:
+    from bs4.filter import ElementFilter
+except ImportError:  # beautifulsoup4 < 4.13
+    ElementFilter = None
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+logger = get_logger()
+
+FEATURES_TESTID = "aviv.CDP.Sections.Features"
+FEATURE_TESTID = "aviv.CDP.Sections.Features.Feature"
+ADDRESS_TESTID = "aviv.CDP.Location.Address"
+FEATURE_TEXT_CLASS = "css-1az3ztj"
+
+GEOJSON_PATTERN = re.compile(r'geojson\((.*?)\)/')
+SCRIPT_PATTERN = re.compile(r'<script\b[^>]*>(.*?)</script\s*>', re.IGNORECASE | re.DOTALL)
+SCRIPT_COORDINATES_PATTERN = re.compile(r'\[(\d+\.\d+),\s*(\d+\.\d+)\]')
+
+
+def clean_image_url(url):
+    """Clean the image URL to get the original version without size parameters."""
+    # Remove size parameters (w= and h=)
+    url = re.sub(r'[?&]w=\d+', '', url)
+    url = re.sub(r'[?&]h=\d+', '', url)
+
+    # Extract the base URL and query parameters
+    parsed = urllib.parse.urlparse(url)
+    params = urllib.parse.parse_qs(parsed.query)
+
+    # Keep only the ci_seal parameter if it exists
+    cleaned_params = {}
+    if 'ci_seal' in params:
+        cleaned_params['ci_seal'] = params['ci_seal'][0]
+
+    # Reconstruct the URL
+    cleaned_url = urllib.parse.urlunparse((
+        parsed.scheme,
+        parsed.netloc,
+        parsed.path,
+        parsed.params,
+        urllib.parse.urlencode(cleaned_params),
+        parsed.fragment
+    ))
+
+    return cleaned_url
+
+
+def parse_map_coordinates(src_url):
+    """Extract coordinates from the GeoJSON embedded in a map image URL."""
+    geojson_match = GEOJSON_PATTERN.search(src_url)
+    if not geojson_match:
+        return None
+
+    # Extract and decode the GeoJSON
+    geojson_decoded = unquote(geojson_match.group(1))
+
+    try:
+        # Parse the GeoJSON
+        geojson_data = json.loads(geojson_decoded)
+        coordinates = geojson_data['geometry']['coordinates']
+
+        # Check the geometry type
+        geometry_type = geojson_data['geometry']['type']
+
+        if geometry_type == 'Point':
+            # For Point type, coordinates are directly [longitude, latitude]
+            longitude, latitude = coordinates
+            return {
+                'coordinates': [coordinates],  # Wrap in list for consistency
+                'centroid': (longitude, latitude)
+            }
+        elif geometry_type == 'Polygon':
+            # For Polygon type, calculate centroid from polygon coordinates
+            coordinates = coordinates[0][:-1]  # Remove the closing point
+            sum_lon = sum(p[0] for p in coordinates)
+            sum_lat = sum(p[1] for p in coordinates)
+            centroid = (sum_lon/len(coordinates), sum_lat/len(coordinates))
+            return {
+                'coordinates': coordinates,
+                'centroid': centroid
+            }
+        else:
+            logger.warning(f"Unexpected geometry type: {geometry_type}")
+            return None
+
+    except json.JSONDecodeError:
+        logger.error("Error decoding GeoJSON")
+        return None
+    except KeyError:
+        logger.error("Unexpected GeoJSON structure")
+        return None
+    except Exception as e:
+        logger.error(f"Error processing coordinates: {str(e)}")
+        return None
+
+
+def parse_script_coordinates(html):
+    """Fallback: find coordinates in inline scripts of the raw HTML."""
+    if "coordinates" not in html:
+        return None, None
+    try:
+        for match in SCRIPT_PATTERN.finditer(html):
+            script = match.group(1)
+            if script and "coordinates" in script:
+                coords_match = SCRIPT_COORDINATES_PATTERN.search(script)
+                if coords_match:
+                    longitude = float(coords_match.group(1))
+                    latitude = float(coords_match.group(2))
+                    logger.info(f"Found coordinates from script: lat={latitude}, lon={longitude}")
+                    return latitude, longitude
+    except Exception as e:
+        logger.error(f"Error extracting coordinates: {str(e)}")
+    return None, None
+
+
+def is_detail_section(name, attrs):
+    """Check whether a top-level tag belongs to a section the detail extractor needs."""
+    attrs = attrs or {}
+    if name == "picture":
+        return True
+    if name == "img":
+        return attrs.get("alt") == "Standort"
+    if name == "section":
+        return attrs.get("data-testid") == FEATURES_TESTID
+    if name == "div":
+        return attrs.get("data-testid") == ADDRESS_TESTID
+    return False
+
+
+if ElementFilter is not None:
+    class DetailSectionFilter(ElementFilter):
+        """Only build the subtrees of the sections we extract data from"""
+
+        def allow_tag_creation(self, nsprefix, name, attrs):
+            return is_detail_section(name, attrs)
+
+        def allow_string_creation(self, string):
+            return False
+
+    def _detail_strainer():
+        return DetailSectionFilter()
+else:
+    def _detail_strainer():
+        return SoupStrainer(is_detail_section)
+
+
+class DetailPageExtractor:
+    def __init__(self, backend=None):
+        """Initialize the extractor with a parser backend (auto, selectolax, lxml or html.parser)"""
+        self.backend = self._resolve_backend(backend or Config.HTML_PARSER)
+        logger.debug(f"Detail page extractor using backend: {self.backend}")
+
+    def _resolve_backend(self, backend):
+        """Pick the fastest available backend for 'auto' and validate explicit choices"""
+        if backend == 'auto':
+            if HTMLParser is not None:
+                return 'selectolax'
+            return 'lxml' if LXML_AVAILABLE else 'html.parser'
+        if backend == 'selectolax' and HTMLParser is None:
+            logger.warning("selectolax is not installed, falling back to BeautifulSoup")
+            return 'lxml' if LXML_AVAILABLE else 'html.parser'
+        if backend == 'lxml' and not LXML_AVAILABLE:
+            logger.warning("lxml is not installed, falling back to html.parser")
+            return 'html.parser'
+        return backend
+
+    def extract(self, html):
+        """Extract features, address, coordinates and images from a detail page"""
+        if self.backend == 'selectolax':
+            data = self._extract_selectolax(html)
+        else:
+            data = self._extract_soup(html)
+
+        latitude = None
+        longitude = None
+        coordinates_data = parse_map_coordinates(data['map_src']) if data['map_src'] else None
+        if coordinates_data:
+            longitude, latitude = coordinates_data['centroid']
+            logger.info(f"Found coordinates from GeoJSON: lat={latitude}, lon={longitude}")
+        else:
+            # Fallback to the old method
+            latitude, longitude = parse_script_coordinates(html)
+
+        return {
+            "features": data['features'],
+            "full_address": data['full_address'],
+            "latitude": latitude,
+            "longitude": longitude,
+            "image_urls": data['image_urls']
+        }
+
+    def parse(self, html):
+        """Parse only the detail page sections into a BeautifulSoup tree"""
+        return BeautifulSoup(html, self.backend, parse_only=_detail_strainer())
+
+    def _extract_soup(self, html):
+        """Extract the raw section data with BeautifulSoup"""
+        soup = self.parse(html)
+
+        # Extract features
+        features = []
+        features_section = soup.find("section", {"data-testid": FEATURES_TESTID})
+        if features_section:
+            feature_items = features_section.find_all("div", {"data-testid": FEATURE_TESTID})
+            for item in feature_items:
+                feature_text = item.find("span", class_=FEATURE_TEXT_CLASS)
+                if feature_text:
+                    features.append(feature_text.text.strip())
+
+        # Extract address
+        address_div = soup.find("div", {"data-testid": ADDRESS_TESTID})
+        full_address = address_div.text.strip() if address_div else "Keine Adresse gefunden"
+
+        map_img = soup.find('img', alt='Standort')
+
+        return {
+            'features': features,
+            'full_address': full_address,
+            'map_src': map_img.get('src') if map_img else None,
+            'image_urls': self.extract_images(soup)
+        }
+
+    def _extract_selectolax(self, html):
+        """Extract the raw section data with selectolax"""
+        tree = HTMLParser(html)
+
+        features = []
+        features_section = tree.css_first(f'section[data-testid="{FEATURES_TESTID}"]')
+        if features_section:
+            for item in features_section.css(f'div[data-testid="{FEATURE_TESTID}"]'):
+                feature_text = item.css_first(f'span.{FEATURE_TEXT_CLASS}')
+                if feature_text:
+                    features.append(feature_text.text().strip())
+
+        address_div = tree.css_first(f'div[data-testid="{ADDRESS_TESTID}"]')
+        full_address = address_div.text().strip() if address_div else "Keine Adresse gefunden"
+
+        map_img = tree.css_first('img[alt="Standort"]')
+
+        images = []
+        try:
+            for picture in tree.css("picture"):
+                for source in picture.css("source"):
+                    srcset = source.attributes.get("srcset")
+                    if srcset:
+                        urls = [url.strip().split()[0] for url in srcset.split(",")]
+                        if urls:
+                            cleaned_url = clean_image_url(urls[0])
+                            if cleaned_url:
+                                images.append(cleaned_url)
+
+                img = picture.css_first("img")
+                if img and img.attributes.get("src"):
+                    cleaned_url = clean_image_url(img.attributes["src"])
+                    if cleaned_url:
+                        images.append(cleaned_url)
+            images = list(dict.fromkeys(images))
+        except Exception as e:
+            logger.error(f"Error extracting images: {str(e)}")
+            images = []
+
+        return {
+            'features': features,
+            'full_address': full_address,
+            'map_src': map_img.attributes.get('src') if map_img else None,
+            'image_urls': images
+        }
+
+    def extract_images(self, soup):
+        """Extract image URLs from the detail page."""
+        images = []
+        try:
+            # Find all picture elements
+            picture_elements = soup.find_all("picture")
+            for picture in picture_elements:
+                # Check source elements first
+                sources = picture.find_all("source")
+                for source in sources:
+                    srcset = source.get("srcset")
+                    if srcset:
+                        # Extract URLs from srcset
+                        urls = [url.strip().split()[0] for url in srcset.split(",")]
+                        if urls:
+                            # Clean the URL and add to images list
+                            cleaned_url = clean_image_url(urls[0])
+                            if cleaned_url:
+                                images.append(cleaned_url)
+
+                # Check img element as fallback
+                img = picture.find("img")
+                if img and img.get("src"):
+                    cleaned_url = clean_image_url(img["src"])
+                    if cleaned_url:
+                        images.append(cleaned_url)
+
+            # Remove duplicates while preserving order
+            images = list(dict.fromkeys(images))
+            logger.debug(f"Found {len(images)} unique images")
+            return images
+
+        except Exception as e:
+            logger.error(f"Error extracting images: {str(e)}")
+            return []
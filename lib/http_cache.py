@@ -0,0 +1,136 @@
+# lib/http_cache.py
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from .logger import get_logger
+from .config import Config
+
+logger = get_logger()
+
+
+class ResponseCache:
+    def __init__(self, filename=None, ttl=None, max_bytes=None):
+        """Initialize an on-disk HTTP response cache backed by SQLite"""
+        self.filename = filename or Config.HTTP_CACHE_FILE
+        self.ttl = Config.HTTP_CACHE_TTL if ttl is None else ttl
+        self.max_bytes = max_bytes or Config.HTTP_CACHE_MAX_BYTES
+        self.lock = threading.Lock()
+        # Access times of cache hits, written in batches instead of one commit per hit
+        self.pending_access = {}
+
+        cache_dir = os.path.dirname(self.filename)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # Shared by the scraper's worker threads, guarded by self.lock
+        self.conn = sqlite3.connect(self.filename, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                accessed_at REAL,
+                size INTEGER
+            )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        logger.debug(f"HTTP cache at {self.filename} holds {self.total_bytes} bytes")
+
+    def get(self, url):
+        """Return the cached entry for a URL, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.pending_access[url] = time.time()
+            if len(self.pending_access) >= Config.HTTP_CACHE_ACCESS_BATCH:
+                self._flush_access()
+                self.conn.commit()
+
+        body, etag, last_modified, fetched_at = row
+        return {
+            'body': zlib.decompress(body).decode('utf-8'),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': fetched_at
+        }
+
+    def is_fresh(self, entry):
+        """Check whether a cached entry is younger than the TTL"""
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    def conditional_headers(self, entry):
+        """Build If-None-Match / If-Modified-Since headers for revalidating an entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, text, etag=None, last_modified=None):
+        """Store a response body compressed, evicting least recently used entries if needed"""
+        body = zlib.compress(text.encode('utf-8'))
+        now = time.time()
+        with self.lock:
+            previous = self.conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self.conn.execute('''
+                INSERT OR REPLACE INTO responses
+                    (url, body, etag, last_modified, fetched_at, accessed_at, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (url, body, etag, last_modified, now, now, len(body)))
+            self.pending_access.pop(url, None)
+            self.total_bytes += len(body) - (previous[0] if previous else 0)
+            if self.total_bytes > self.max_bytes:
+                self._flush_access()
+                self._evict()
+            self.conn.commit()
+
+    def touch(self, url):
+        """Mark an entry as revalidated (e.g. after a 304 Not Modified)"""
+        now = time.time()
+        with self.lock:
+            self.pending_access.pop(url, None)
+            self.conn.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url)
+            )
+            self.conn.commit()
+
+    def _flush_access(self):
+        """Write the recorded access times of cache hits; the caller holds the lock and commits"""
+        if self.pending_access:
+            self.conn.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE url = ?",
+                [(accessed_at, url) for url, accessed_at in self.pending_access.items()]
+            )
+            self.pending_access = {}
+
+    def _evict(self):
+        """Delete least recently used entries until the cache is below 90% of its size limit"""
+        target = self.max_bytes * 0.9
+        evicted = []
+        rows = self.conn.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall()
+        for url, size in rows:
+            if self.total_bytes <= target:
+                break
+            evicted.append((url,))
+            self.total_bytes -= size
+        self.conn.executemany("DELETE FROM responses WHERE url = ?", evicted)
+        logger.debug(f"Evicted {len(evicted)} cached responses")
+
+    def close(self):
+        """Write pending access times and close the cache database"""
+        with self.lock:
+            self._flush_access()
+            self.conn.commit()
+            self.conn.close()
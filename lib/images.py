@@ -0,0 +1,102 @@
+# lib/images.py
+import os
+import hashlib
+import tempfile
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from requests.adapters import HTTPAdapter
+from .logger import get_logger
+from .config import Config
+from .rate_limiter import HostRateLimiter
+
+logger = get_logger()
+
+
+def get_file_extension(url):
+    """Get the correct file extension from the image URL."""
+    # Extract the path from the URL
+    path = urllib.parse.urlparse(url).path
+
+    # Get the original extension
+    ext = os.path.splitext(path)[1].lower()
+
+    # If no extension or not a common image extension, default to .jpg
+    valid_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+    return ext if ext in valid_extensions else '.jpg'
+
+
+class ImageDownloader:
+    def __init__(self, image_dir, db_handler, workers=None, requests_per_second=None):
+        """Initialize a parallel image downloader storing files by content hash"""
+        self.image_dir = image_dir
+        self.db_handler = db_handler
+        self.workers = workers or Config.IMAGE_WORKERS
+        self.rate_limiter = HostRateLimiter(rate=requests_per_second)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+            'Accept': 'image/avif,image/webp,image/*,*/*;q=0.8',
+        })
+        os.makedirs(self.image_dir, exist_ok=True)
+
+    def relative_path(self, sha256, ext):
+        """Content-addressed path of an image relative to the image directory"""
+        return os.path.join(sha256[:2], f"{sha256}{ext}")
+
+    def _download(self, url):
+        """Download one image and store it under its content hash"""
+        self.rate_limiter.acquire(url)
+        response = self.session.get(url, timeout=Config.TIMEOUT)
+        response.raise_for_status()
+        content = response.content
+
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = self.relative_path(sha256, get_file_extension(url))
+        filepath = os.path.join(self.image_dir, path)
+        if not os.path.exists(filepath):
+            # Write to a temp file first so a crash never leaves a truncated image
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, filepath)
+
+        return {'url': url, 'sha256': sha256, 'path': path, 'size': len(content)}
+
+    def download(self, urls):
+        """Download all images not stored yet and record the URL -> hash mapping"""
+        urls = [url for url in dict.fromkeys(urls) if url]
+        known = self.db_handler.get_image_hashes(urls)
+        pending = [
+            url for url in urls
+            if url not in known or not os.path.exists(os.path.join(self.image_dir, known[url]['path']))
+        ]
+        logger.info(f"Downloading {len(pending)} of {len(urls)} images ({len(urls) - len(pending)} already stored)")
+
+        downloaded = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._download, url): url for url in pending}
+            for future in as_completed(futures):
+                try:
+                    downloaded.append(future.result())
+                except Exception as e:
+                    logger.warning(f"Failed to download image {futures[future]}: {str(e)}")
+
+        if downloaded:
+            self.db_handler.save_images(downloaded)
+        unique = len({image['sha256'] for image in downloaded})
+        logger.info(f"Downloaded {len(downloaded)} images ({unique} unique files)")
+        return downloaded
+
+    def download_listing_images(self, df):
+        """Download the images referenced in the Images column of a listings DataFrame"""
+        if 'Images' not in df.columns:
+            return []
+        urls = []
+        for images in df['Images'].dropna():
+            urls.extend(url.strip() for url in str(images).split(';') if url.strip())
+        return self.download(urls)
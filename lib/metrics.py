@@ -0,0 +1,204 @@
+# lib/metrics.py
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from .config import Config
+
+
+def _key(name, labels):
+    """Identify a metric series by its name and sorted labels"""
+    return (name, tuple(sorted(labels.items())))
+
+
+def _format_labels(labels, extra=None):
+    """Render labels in Prometheus exposition syntax"""
+    pairs = list(labels) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        """Fixed-bucket histogram of observed values"""
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket it falls into"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + [self.max], self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], self.counts))
+        }
+
+
+class Metrics:
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Metrics, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not Metrics._initialized:
+            self.lock = threading.Lock()
+            self.reset()
+            Metrics._initialized = True
+
+    def reset(self):
+        """Start a new run with empty metrics"""
+        with self.lock:
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+            self.stages = []
+            self.started_at = datetime.now()
+
+    def inc(self, name, value=1, **labels):
+        """Increase a counter"""
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """Set a gauge to its latest value"""
+        with self.lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, buckets=None, **labels):
+        """Record a value in a histogram (latency buckets by default)"""
+        key = _key(name, labels)
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(buckets or Config.METRICS_LATENCY_BUCKETS)
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of a block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def stage(self, name):
+        """Time a pipeline stage for the run report"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            with self.lock:
+                self.stages.append({'stage': name, 'seconds': round(duration, 3)})
+            self.set_gauge('stage_duration_seconds', duration, stage=name)
+
+    def record_throughput(self, name, rows, seconds):
+        """Count processed rows and record the rows per second of one batch"""
+        self.inc(f'{name}_rows_total', rows)
+        if seconds > 0:
+            self.set_gauge(f'{name}_rows_per_second', rows / seconds)
+
+    def snapshot(self):
+        """Return all metrics as a JSON-serializable dict"""
+        def series(items, render):
+            result = {}
+            for (name, labels), value in sorted(items, key=lambda item: item[0]):
+                result.setdefault(name, []).append({'labels': dict(labels), 'value': render(value)})
+            return result
+
+        with self.lock:
+            return {
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'finished_at': datetime.now().isoformat(timespec='seconds'),
+                'stages': list(self.stages),
+                'counters': series(self.counters.items(), lambda value: value),
+                'gauges': series(self.gauges.items(), lambda value: value),
+                'histograms': series(self.histograms.items(), lambda value: value.summary())
+            }
+
+    def write_report(self, output_file=None, **extra):
+        """Write the machine-readable run report, by default into the log directory"""
+        report = self.snapshot()
+        report.update(extra)
+        if output_file is None:
+            os.makedirs(Config.LOG_DIR, exist_ok=True)
+            output_file = os.path.join(
+                Config.LOG_DIR,
+                f"run_report_{self.started_at.strftime('%Y-%m-%d_%H%M%S')}.json"
+            )
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return output_file
+
+    def write_prometheus(self, output_file):
+        """Write all metrics in the Prometheus text format for the node_exporter textfile collector"""
+        prefix = Config.METRICS_PREFIX
+        lines = []
+        with self.lock:
+            for kind, items in [('counter', self.counters), ('gauge', self.gauges)]:
+                typed = set()
+                for (name, labels), value in sorted(items.items()):
+                    if name not in typed:
+                        lines.append(f"# TYPE {prefix}{name} {kind}")
+                        typed.add(name)
+                    lines.append(f"{prefix}{name}{_format_labels(labels)} {value}")
+
+            typed = set()
+            for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                if name not in typed:
+                    lines.append(f"# TYPE {prefix}{name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ['+Inf'], histogram.counts):
+                    cumulative += count
+                    lines.append(f"{prefix}{name}_bucket{_format_labels(labels, {'le': bound})} {cumulative}")
+                lines.append(f"{prefix}{name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{prefix}{name}_count{_format_labels(labels)} {histogram.count}")
+
+        # The textfile collector must never read a partially written file
+        tmp_file = f"{output_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_file, output_file)
+        return output_file
+
+
+def get_metrics():
+    """Convenience function to get the metrics registry of the current run."""
+    return Metrics()
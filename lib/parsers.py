@@ -1,5 +1,7 @@
 # lib/parsers.py
 import re
+import numpy as np
+import pandas as pd
 from .logger import get_logger
 
 logger = get_logger()
@@ -64,4 +66,135 @@ def extract_plot_size(details_str):
         return None
     except Exception as e:
         logger.debug(f"Could not extract plot size from '{details_str}': {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+# Vectorized variants of the parsers above, operating on whole pandas Series.
+# They must return exactly what the scalar functions return row by row.
+PRICE_DIGITS_PATTERN = re.compile(r'(\d+)')
+SQM_PATTERN = re.compile(r'(\d+(?:[\.,]\d+)?)\s*m²')
+ROOMS_PATTERN = re.compile(r'(\d+(?:,\d+)?)\s*(?:Zimmer|Zi\.?)')
+PLOT_SIZE_PATTERN = re.compile(r'(\d+(?:[\.,]\d+)?)\s*m²\s*Grundstück')
+
+def _string_values(series):
+    """Return the series with every non-string value replaced by NaN"""
+    if pd.api.types.is_string_dtype(series) and series.dtype != object:
+        return series
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.Series(np.nan, index=series.index, dtype=object)
+    return series.where(series.map(lambda value: isinstance(value, str)))
+
+def _to_float(series):
+    """Convert extracted number strings to float, keeping NaN for missing matches"""
+    return series.astype(object).where(series.notna(), np.nan).astype('float64')
+
+def clean_price_series(series):
+    """Vectorized clean_price"""
+    values = _string_values(series)
+    has_euro = values.str.contains('€', regex=False).fillna(False).astype(bool)
+    head = values.str.split('€', n=1, regex=False).str[0].str.replace('.', '', regex=False)
+    digits = head.str.extract(PRICE_DIGITS_PATTERN, expand=False)
+    return _to_float(digits.where(has_euro))
+
+def extract_sqm_series(series):
+    """Vectorized extract_sqm"""
+    match = _string_values(series).str.extract(SQM_PATTERN, expand=False)
+    return _to_float(match.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+
+def extract_rooms_series(series):
+    """Vectorized extract_rooms"""
+    match = _string_values(series).str.extract(ROOMS_PATTERN, expand=False)
+    return _to_float(match.str.replace(',', '.', regex=False))
+
+def extract_plot_size_series(series):
+    """Vectorized extract_plot_size"""
+    match = _string_values(series).str.extract(PLOT_SIZE_PATTERN, expand=False)
+    return _to_float(match.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+
+def price_per_sqm(prices, areas):
+    """Price per square meter, NaN where either value is missing or the area is not positive"""
+    prices = np.asarray(prices, dtype='float64')
+    areas = np.asarray(areas, dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(areas > 0, prices / areas, np.nan)
+
+# Grouping keys for the materialized analytics aggregates
+OFFER_SUFFIX_PATTERN = re.compile(r'\s+(?:zum Kauf|zur Miete|zur (?:Zwangs)?[Vv]ersteigerung)\s*$')
+REGION_PATTERN = re.compile(r'([^,(]+?)\s*\(\d{5}\)\s*$')
+
+def property_type_series(series):
+    """Property type from the Beschreibung headline, e.g. 'Wohnung zum Kauf' -> 'Wohnung'"""
+    values = _string_values(series).str.replace(OFFER_SUFFIX_PATTERN, '', regex=True).str.strip()
+    return values.where(values.str.len() > 0).fillna('Unbekannt')
+
+def region_series(series):
+    """Town from the Adresse, e.g. 'Olewig 3, Trier (54295)' -> 'Trier'"""
+    values = _string_values(series).str.extract(REGION_PATTERN, expand=False).str.strip()
+    return values.where(values.str.len() > 0).fillna('Unbekannt')
+
+# "2 Stellplätze: Garage, 2 Außen-Stellplätze": the label only counts the spaces,
+# counted values name a parking type in the plural
+PARKING_COUNT_PATTERN = re.compile(r'^\d+ Stellplätze?$')
+COUNTED_PARKING_PATTERN = re.compile(r'^\d+ (\S*(?:[Ss]tellpl(?:atz|ätze)|Carports?))$')
+
+def _parking_name(value):
+    """Singular base name of a counted parking value, e.g. '2 Außen-Stellplätze' -> 'Außen-Stellplatz'"""
+    match = COUNTED_PARKING_PATTERN.match(value)
+    if not match:
+        return value
+    name = match.group(1)
+    return name[:-len('plätze')] + 'platz' if name.endswith('plätze') else name.rstrip('s')
+
+# Spellings of the same feature folded into one facet name; availability is free text
+# ("Ab sofort!", "n. Absprache", ...) and only its two common meanings are folded
+FEATURE_ALIASES = {
+    'badewanne': 'Badezimmer: Badewanne',
+    'bad mit dusche': 'Badezimmer: Bad mit Dusche',
+    'bad mit fenster': 'Badezimmer: Bad mit Fenster',
+    'bad/wc getrennt': 'Badezimmer: Bad/WC getrennt',
+    'bidet': 'Badezimmer: Bidet',
+}
+AVAILABLE_NOW_PATTERN = re.compile(r'\bsofort\b', re.IGNORECASE)
+AVAILABLE_BY_ARRANGEMENT_PATTERN = re.compile(r'vereinbar|absprach|rücksprache', re.IGNORECASE)
+AVAILABLE_NOW = 'Bezug: sofort'
+AVAILABLE_BY_ARRANGEMENT = 'Bezug: nach Vereinbarung'
+# Broader facets added next to the specific feature
+FEATURE_FACETS = {
+    'voll unterkellert': 'Keller',
+    'kelleranteil': 'Keller',
+}
+
+def _canonical_feature(value):
+    """Facet name of an unlabeled feature value"""
+    if AVAILABLE_NOW_PATTERN.search(value):
+        return AVAILABLE_NOW
+    if AVAILABLE_BY_ARRANGEMENT_PATTERN.search(value):
+        return AVAILABLE_BY_ARRANGEMENT
+    return FEATURE_ALIASES.get(value.lower(), value)
+
+def feature_names(features_str):
+    """Split a '; '-joined Features string into normalized feature names.
+
+    Grouped entries are split into one name per value, keeping their label,
+    e.g. 'Bodenbelag: Fliesen, Laminat' -> 'Bodenbelag: Fliesen', 'Bodenbelag: Laminat'.
+    Parking counts are dropped, so '3 Stellplätze: Garage, 2 Außen-Stellplätze'
+    -> 'Garage', 'Außen-Stellplatz' and '2 Stellplätze' -> 'Stellplatz'.
+    Spellings are folded into facets ('Ab sofort' -> 'Bezug: sofort', 'Badewanne'
+    -> 'Badezimmer: Badewanne') and 'voll unterkellert' or 'Kelleranteil' add 'Keller'.
+    """
+    if not isinstance(features_str, str):
+        return []
+    names = []
+    for item in features_str.split(';'):
+        label, _, values = item.rpartition(':')
+        label = label.strip()
+        if PARKING_COUNT_PATTERN.match(label):
+            label = ''
+        for value in values.split(','):
+            value = _parking_name(' '.join(value.split()))
+            if not value:
+                continue
+            name = f"{label}: {value}" if label else _canonical_feature(value)
+            names.append(name)
+            if name.lower() in FEATURE_FACETS:
+                names.append(FEATURE_FACETS[name.lower()])
+    return list(dict.fromkeys(names))
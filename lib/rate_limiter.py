@@ -0,0 +1,54 @@
+# lib/rate_limiter.py
+import threading
+import time
+from urllib.parse import urlparse
+from .config import Config
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        """Initialize a token bucket refilling `rate` tokens per second up to `capacity`"""
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        """Add the tokens accumulated since the last refill"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self):
+        """Block until a token is available and consume it"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    def __init__(self, rate=None, burst=None):
+        """Initialize a limiter keeping one token bucket per host"""
+        self.rate = rate or Config.REQUESTS_PER_SECOND
+        self.burst = burst or Config.RATE_LIMIT_BURST
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _get_bucket(self, host):
+        """Get or create the token bucket for a host"""
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self.buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url):
+        """Wait until a request to the host of `url` is allowed"""
+        self._get_bucket(urlparse(url).netloc).acquire()
@@ -1,43 +1,19 @@
 # lib/scraper.py
-import json
 import requests
 from bs4 import BeautifulSoup
 import time
 import re
 import urllib.parse
-from urllib.parse import urljoin, unquote
-import random
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from .logger import get_logger
 from .config import Config
+from .rate_limiter import HostRateLimiter
+from .metrics import get_metrics
+from .detail_extractor import DetailPageExtractor, parse_map_coordinates
 logger = get_logger()
-
-def clean_image_url(url):
-    """Clean the image URL to get the original version without size parameters."""
-    # Remove size parameters (w= and h=)
-    url = re.sub(r'[?&]w=\d+', '', url)
-    url = re.sub(r'[?&]h=\d+', '', url)
-    
-    # Extract the base URL and query parameters
-    parsed = urllib.parse.urlparse(url)
-    params = urllib.parse.parse_qs(parsed.query)
-    
-    # Keep only the ci_seal parameter if it exists
-    cleaned_params = {}
-    if 'ci_seal' in params:
-        cleaned_params['ci_seal'] = params['ci_seal'][0]
-    
-    # Reconstruct the URL
-    cleaned_url = urllib.parse.urlunparse((
-        parsed.scheme,
-        parsed.netloc,
-        parsed.path,
-        parsed.params,
-        urllib.parse.urlencode(cleaned_params),
-        parsed.fragment
-    ))
-    
-    return cleaned_url
-
+metrics = get_metrics()
 
 def calculate_polygon_centroid(coordinates):
     """Calculate the centroid of a polygon from coordinates."""
@@ -50,8 +26,16 @@ def calculate_polygon_centroid(coordinates):
     return x_centroid, y_centroid
 
 class WebScraper:
-    def __init__(self):
+    def __init__(self, workers=None, requests_per_second=None, cache=None, offline=False):
+        self.workers = workers or Config.DETAIL_WORKERS
+        self.cache = cache
+        self.offline = offline
+        self.rate_limiter = HostRateLimiter(rate=requests_per_second)
         self.session = requests.Session()
+        # Size the connection pool so parallel workers can reuse connections
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -60,10 +44,12 @@ class WebScraper:
         }
         self.session.headers.update(self.headers)
         self.base_url = "https://www.immowelt.de"
+        self.failed_pages = []
+        self.detail_extractor = DetailPageExtractor()
 
     def extract_coordinates_from_html(self, html_content):
         """Extract coordinates from HTML content."""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = self.detail_extractor.parse(html_content)
         
         # Find the img tag with the mapbox URL
         map_img = soup.find('img', alt='Standort')
@@ -71,132 +57,147 @@ class WebScraper:
         if not map_img:
             return None
         
-        # Get the src attribute
-        src_url = map_img['src']
-        
-        # Find the geojson part in the URL
-        geojson_match = re.search(r'geojson\((.*?)\)/', src_url)
-        
-        if not geojson_match:
-            return None
-        
-        # Extract and decode the GeoJSON
-        geojson_encoded = geojson_match.group(1)
-        geojson_decoded = unquote(geojson_encoded)
-        
-        try:
-            # Parse the GeoJSON
-            geojson_data = json.loads(geojson_decoded)
-            coordinates = geojson_data['geometry']['coordinates']
-            
-            # Check the geometry type
-            geometry_type = geojson_data['geometry']['type']
-            
-            if geometry_type == 'Point':
-                # For Point type, coordinates are directly [longitude, latitude]
-                longitude, latitude = coordinates
-                return {
-                    'coordinates': [coordinates],  # Wrap in list for consistency
-                    'centroid': (longitude, latitude)
-                }
-            elif geometry_type == 'Polygon':
-                # For Polygon type, calculate centroid from polygon coordinates
-                coordinates = coordinates[0][:-1]  # Remove the closing point
-                sum_lon = sum(p[0] for p in coordinates)
-                sum_lat = sum(p[1] for p in coordinates)
-                centroid = (sum_lon/len(coordinates), sum_lat/len(coordinates))
-                return {
-                    'coordinates': coordinates,
-                    'centroid': centroid
-                }
-            else:
-                logger.warning(f"Unexpected geometry type: {geometry_type}")
+        return parse_map_coordinates(map_img['src'])
+
+    def _make_request(self, url, retries=Config.RETRY_ATTEMPTS, delay=Config.REQUEST_DELAY, cacheable=False):
+        """Fetch a URL, serving cacheable responses from the response cache while fresh"""
+        # Only cacheable responses are served from the cache, except when replaying offline
+        entry = self.cache.get(url) if self.cache and (cacheable or self.offline) else None
+        if self.offline:
+            # Replay from cache only, never touch the network
+            if entry is None:
+                logger.warning(f"Offline mode: no cached response for {url}")
+                metrics.inc('http_cache_misses_total')
                 return None
-                
-        except json.JSONDecodeError:
-            logger.error("Error decoding GeoJSON")
-            return None
-        except KeyError:
-            logger.error("Unexpected GeoJSON structure")
-            return None
-        except Exception as e:
-            logger.error(f"Error processing coordinates: {str(e)}")
-            return None
-
-
+            metrics.inc('http_cache_hits_total', source='offline')
+            return entry['body']
+        if cacheable and entry and self.cache.is_fresh(entry):
+            metrics.inc('http_cache_hits_total', source='fresh')
+            return entry['body']
 
-
-    def _make_request(self, url, retries=Config.RETRY_ATTEMPTS, delay=Config.REQUEST_DELAY):
+        headers = self.cache.conditional_headers(entry) if cacheable and entry else None
         for attempt in range(retries):
+            if attempt:
+                metrics.inc('http_retries_total')
             try:
-                time.sleep(delay)
-                response = self.session.get(url, timeout=Config.TIMEOUT)
+                with metrics.timer('rate_limit_wait_seconds'):
+                    self.rate_limiter.acquire(url)
+                start = time.perf_counter()
+                response = self.session.get(url, timeout=Config.TIMEOUT, headers=headers)
+                metrics.observe('http_request_duration_seconds', time.perf_counter() - start)
+                metrics.inc('http_responses_total', status=response.status_code)
+                metrics.inc('http_response_bytes_total', len(response.content))
+                if response.status_code == 304 and entry:
+                    self.cache.touch(url)
+                    metrics.inc('http_cache_hits_total', source='revalidated')
+                    return entry['body']
                 response.raise_for_status()
+                if self.cache:
+                    self.cache.put(
+                        url, response.text,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified')
+                    )
                 return response.text
             except requests.RequestException as e:
                 logger.warning(f"Attempt {attempt + 1} failed for {url}: {str(e)}")
+                metrics.inc('http_errors_total', error=type(e).__name__)
                 if attempt < retries - 1:
                     time.sleep(delay * (attempt + 1))
                 else:
                     logger.error(f"Failed to get HTML after {retries} attempts: {url}")
+                    metrics.inc('http_request_failures_total')
                     return None
 
     def get_detail_page_info(self, url):
-        html = self._make_request(url)
+        html = self._make_request(url, cacheable=True)
         if not html:
+            metrics.inc('detail_pages_total', result='failed')
             return None
 
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Extract features
-        features = []
-        features_section = soup.find("section", {"data-testid": "aviv.CDP.Sections.Features"})
-        if features_section:
-            feature_items = features_section.find_all("div", {"data-testid": "aviv.CDP.Sections.Features.Feature"})
-            for item in feature_items:
-                feature_text = item.find("span", class_="css-1az3ztj")
-                if feature_text:
-                    features.append(feature_text.text.strip())
-
-        # Extract images
-        image_urls = self.extract_images(soup)
-
-        # Extract coordinates using the new method
-        coordinates_data = self.extract_coordinates_from_html(html)
-        latitude = None
-        longitude = None
-        
-        if coordinates_data:
-            longitude, latitude = coordinates_data['centroid']
-            logger.info(f"Found coordinates from GeoJSON: lat={latitude}, lon={longitude}")
-        else:
-            # Fallback to the old method
-            try:
-                for script in soup.find_all("script"):
-                    if script.string and "coordinates" in str(script.string):
-                        coords_match = re.search(r'\[(\d+\.\d+),\s*(\d+\.\d+)\]', script.string)
-                        if coords_match:
-                            try:
-                                longitude = float(coords_match.group(1))
-                                latitude = float(coords_match.group(2))
-                                logger.info(f"Found coordinates from script: lat={latitude}, lon={longitude}")
-                                break
-                            except Exception as e:
-                                logger.error(f"Error extracting coordinates from script: {str(e)}")
-            except Exception as e:
-                logger.error(f"Error extracting coordinates: {str(e)}")
-
-        # Extract address
-        address_div = soup.find("div", {"data-testid": "aviv.CDP.Location.Address"})
-        full_address = address_div.text.strip() if address_div else "Keine Adresse gefunden"
-
-        return {
-            "features": features,
-            "full_address": full_address,
-            "latitude": latitude,
-            "longitude": longitude,
-            "image_urls": image_urls
-        }
+        # Parse the page once and extract all sections from the same tree
+        with metrics.timer('detail_parse_seconds'):
+            details = self.detail_extractor.extract(html)
+        metrics.inc('detail_pages_total', result='ok')
+        return details
+
+    def check_listing_status(self, url):
+        """Cheaply check whether a listing is gone: 'closed', 'active' or 'unknown'"""
+        try:
+            self.rate_limiter.acquire(url)
+            response = self.session.head(url, timeout=Config.TIMEOUT, allow_redirects=False)
+            if response.status_code in (403, 405, 501):
+                # HEAD not supported, fall back to a GET without reading the body
+                self.rate_limiter.acquire(url)
+                response = self.session.get(url, timeout=Config.TIMEOUT, allow_redirects=False, stream=True)
+                response.close()
+        except requests.RequestException as e:
+            logger.debug(f"Could not verify {url}: {str(e)}")
+            return 'unknown'
+
+        if response.status_code in (404, 410):
+            return 'closed'
+        if response.is_redirect:
+            location = urllib.parse.urlparse(urljoin(url, response.headers.get('Location', '')))
+            if location.path in ('', '/') or any(marker in location.path for marker in Config.CLOSED_REDIRECT_MARKERS):
+                return 'closed'
+            return 'unknown'
+        return 'active' if response.ok else 'unknown'
+
+    def verify_closed_listings(self, links, workers=None):
+        """Check candidate-closed listings in parallel and return a dict of link -> status"""
+        links = list(dict.fromkeys(links))
+        workers = workers or self.workers
+        if not links:
+            return {}
+
+        logger.info(f"Verifying {len(links)} vanished listings with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            statuses = dict(zip(links, executor.map(self.check_listing_status, links)))
+        for status in ('closed', 'active', 'unknown'):
+            count = sum(1 for value in statuses.values() if value == status)
+            metrics.inc('closure_checks_total', count, result=status)
+        return statuses
+
+    def scrape_detail_pages(self, links, workers=None, on_batch=None, batch_size=None):
+        """Scrape detail pages concurrently and return a dict of link -> details.
+
+        If on_batch is given it is called from the calling thread with every
+        batch_size completed results, e.g. to checkpoint them.
+        """
+        links = list(dict.fromkeys(links))
+        workers = workers or self.workers
+        batch_size = batch_size or Config.CHECKPOINT_BATCH_SIZE
+        results = {}
+        batch = {}
+        if not links:
+            return results
+
+        logger.info(f"Scraping {len(links)} detail pages with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.get_detail_page_info, link): link for link in links}
+            for i, future in enumerate(as_completed(futures), start=1):
+                link = futures[future]
+                try:
+                    results[link] = future.result()
+                except Exception as e:
+                    logger.error(f"Error scraping detail page {link}: {str(e)}")
+                    results[link] = None
+                if results[link]:
+                    logger.info(f"[{i}/{len(links)}] Detail scraped: {link}")
+                else:
+                    logger.warning(f"[{i}/{len(links)}] Could not retrieve details for: {link}")
+
+                if on_batch:
+                    batch[link] = results[link]
+                    if len(batch) >= batch_size:
+                        on_batch(batch)
+                        batch = {}
+
+        if on_batch and batch:
+            on_batch(batch)
+
+        return results
 
 
     
@@ -282,42 +283,125 @@ class WebScraper:
             logger.error(f"Error determining total pages: {str(e)}")
             return 1
 
-    def scrape_all_listings(self, base_url=None):
+    def _page_url(self, base_url, page):
+        """Build the search result URL for a page number"""
+        return f"{base_url}&page={page}" if page > 1 else base_url
+
+    def _scrape_page(self, base_url, page):
+        """Fetch and parse a single search result page, None if the request failed"""
+        html = self._make_request(self._page_url(base_url, page))
+        if not html:
+            return None
+        with metrics.timer('search_page_parse_seconds'):
+            return self.get_listings_from_page(html)
+
+    def scrape_all_listings(self, base_url=None, workers=None):
         """Scrape all listings from all pages"""
         base_url = base_url or Config.BASE_URL
+        workers = workers or Config.PAGE_WORKERS
         logger.info("Starting to scrape all listings...")
-        all_listings = []
-        page = 1
+        self.failed_pages = []
 
         # Get first page and determine total pages
         html = self._make_request(base_url)
         if not html:
+            self.failed_pages.append(1)
             return []
 
         total_pages = self.get_total_pages(html)
         logger.info(f"Found {total_pages} pages to scrape")
 
-        while page <= total_pages:
-            url = f"{base_url}&page={page}" if page > 1 else base_url
-            logger.info(f"Scraping page {page}/{total_pages}")
-
-            html = self._make_request(url)
-            if not html:
-                break
-
-            page_listings = self.get_listings_from_page(html)
+        # Reuse the first response instead of downloading it again
+        with metrics.timer('search_page_parse_seconds'):
+            results = {1: self.get_listings_from_page(html)}
+        remaining_pages = list(range(2, total_pages + 1))
+        if remaining_pages:
+            logger.info(f"Scraping pages 2-{total_pages} with {workers} workers")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                page_results = executor.map(lambda page: self._scrape_page(base_url, page), remaining_pages)
+                results.update(zip(remaining_pages, page_results))
+
+        # Collect listings in page order, skipping failed pages instead of stopping
+        all_listings = []
+        for page in range(1, total_pages + 1):
+            page_listings = results[page]
+            if page_listings is None:
+                logger.error(f"Failed to scrape page {page}/{total_pages}")
+                self.failed_pages.append(page)
+                continue
             if not page_listings:
                 logger.warning(f"No listings found on page {page}")
-                break
+                continue
 
             all_listings.extend(page_listings)
             logger.info(f"Found {len(page_listings)} listings on page {page}")
 
-            page += 1
-
+        if self.failed_pages:
+            logger.warning(f"{len(self.failed_pages)} pages could not be scraped: {self.failed_pages}")
         logger.info(f"Completed scraping. Total listings found: {len(all_listings)}")
         return all_listings
     
+    def _newest_first_url(self, base_url):
+        """The search URL sorted by newest listings first"""
+        parsed = urllib.parse.urlparse(base_url)
+        params = [(key, value) for key, value in urllib.parse.parse_qsl(parsed.query) if key != 'order']
+        key, value = Config.NEWEST_FIRST_ORDER.split('=', 1)
+        params.append((key, value))
+        return urllib.parse.urlunparse(parsed._replace(query=urllib.parse.urlencode(params, safe=',')))
+
+    def scrape_new_listings(self, is_known, base_url=None, workers=None, stop_after=None):
+        """Scrape the newest listings until `stop_after` consecutive cards are already known.
+
+        `is_known` receives the links of a page and returns the subset already
+        stored. Pages are fetched in windows of `workers` pages so the crawl
+        stays parallel but never runs far past the stopping point.
+        """
+        base_url = self._newest_first_url(base_url or Config.BASE_URL)
+        workers = workers or Config.PAGE_WORKERS
+        stop_after = stop_after or Config.INCREMENTAL_STOP_AFTER_KNOWN
+        logger.info(f"Starting incremental scrape, stopping after {stop_after} known listings in a row...")
+        self.failed_pages = []
+
+        html = self._make_request(base_url)
+        if not html:
+            self.failed_pages.append(1)
+            return []
+        total_pages = self.get_total_pages(html)
+        with metrics.timer('search_page_parse_seconds'):
+            pending = {1: self.get_listings_from_page(html)}
+
+        all_listings = []
+        known_in_a_row = 0
+        page = 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while page <= total_pages:
+                window = list(range(page, min(page + workers, total_pages + 1)))
+                fetch = [p for p in window if p not in pending]
+                pending.update(zip(fetch, executor.map(lambda p: self._scrape_page(base_url, p), fetch)))
+
+                for page in window:
+                    page_listings = pending.pop(page)
+                    if page_listings is None:
+                        logger.error(f"Failed to scrape page {page}/{total_pages}")
+                        self.failed_pages.append(page)
+                        continue
+
+                    known = is_known([listing['Link'] for listing in page_listings])
+                    for listing in page_listings:
+                        all_listings.append(listing)
+                        known_in_a_row = known_in_a_row + 1 if listing['Link'] in known else 0
+                        if known_in_a_row >= stop_after:
+                            logger.info(f"Reached {stop_after} known listings in a row on page {page}/{total_pages}")
+                            logger.info(f"Completed incremental scraping. Total listings found: {len(all_listings)}")
+                            return all_listings
+                    logger.info(f"Found {len(page_listings)} listings on page {page} ({len(known)} already known)")
+                page += 1
+
+        if self.failed_pages:
+            logger.warning(f"{len(self.failed_pages)} pages could not be scraped: {self.failed_pages}")
+        logger.info(f"Completed incremental scraping without reaching known listings. Total listings found: {len(all_listings)}")
+        return all_listings
+    
     def clean_image_url(url):
         """Clean the image URL to get the original version without size parameters."""
         # Remove size parameters (w= and h=)
@@ -359,36 +443,4 @@ class WebScraper:
 
     def extract_images(self, soup):
         """Extract image URLs from the detail page."""
-        images = []
-        try:
-            # Find all picture elements
-            picture_elements = soup.find_all("picture")
-            for picture in picture_elements:
-                # Check source elements first
-                sources = picture.find_all("source")
-                for source in sources:
-                    srcset = source.get("srcset")
-                    if srcset:
-                        # Extract URLs from srcset
-                        urls = [url.strip().split()[0] for url in srcset.split(",")]
-                        if urls:
-                            # Clean the URL and add to images list
-                            cleaned_url = clean_image_url(urls[0])
-                            if cleaned_url:
-                                images.append(cleaned_url)
-                
-                # Check img element as fallback
-                img = picture.find("img")
-                if img and img.get("src"):
-                    cleaned_url = clean_image_url(img["src"])
-                    if cleaned_url:
-                        images.append(cleaned_url)
-
-            # Remove duplicates while preserving order
-            images = list(dict.fromkeys(images))
-            logger.debug(f"Found {len(images)} unique images")
-            return images
-
-        except Exception as e:
-            logger.error(f"Error extracting images: {str(e)}")
-            return []
\ No newline at end of file
+        return self.detail_extractor.extract_images(soup)
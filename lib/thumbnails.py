@@ -0,0 +1,89 @@
+# lib/thumbnails.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .logger import get_logger
+from .config import Config
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = get_logger()
+
+
+def render_derivatives(task):
+    """Render the thumbnail and WebP preview of one image (runs in a worker process)"""
+    source, thumbnail_file, preview_file = task
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img).convert('RGB')
+
+        if not os.path.exists(thumbnail_file):
+            thumbnail = ImageOps.fit(img, Config.THUMBNAIL_SIZE, Image.LANCZOS)
+            _save_atomic(thumbnail, thumbnail_file, 'JPEG', quality=80, optimize=True)
+
+        if not os.path.exists(preview_file):
+            preview = img.copy()
+            preview.thumbnail(Config.PREVIEW_MAX_SIZE, Image.LANCZOS)
+            _save_atomic(preview, preview_file, 'WEBP', quality=Config.PREVIEW_QUALITY, method=4)
+
+    return task
+
+
+def _save_atomic(img, path, image_format, **options):
+    """Save an image through a temp file so readers never see a partial derivative"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    img.save(tmp_path, image_format, **options)
+    os.replace(tmp_path, path)
+
+
+class ThumbnailGenerator:
+    def __init__(self, image_dir, db_handler, workers=None):
+        """Initialize the derivative generator for images downloaded into image_dir"""
+        self.image_dir = image_dir
+        self.db_handler = db_handler
+        self.workers = workers or Config.THUMBNAIL_WORKERS
+
+    def derivative_paths(self, sha256):
+        """Relative paths of the thumbnail and preview of an image"""
+        return (
+            os.path.join('thumbs', sha256[:2], f"{sha256}.jpg"),
+            os.path.join('previews', sha256[:2], f"{sha256}.webp")
+        )
+
+    def generate(self):
+        """Render derivatives for every downloaded image that does not have them yet"""
+        if Image is None:
+            logger.error("Pillow is not installed, skipping thumbnail generation")
+            return 0
+
+        tasks = []
+        records = []
+        for sha256, path in self.db_handler.get_images_without_derivatives():
+            thumbnail_path, preview_path = self.derivative_paths(sha256)
+            thumbnail_file = os.path.join(self.image_dir, thumbnail_path)
+            preview_file = os.path.join(self.image_dir, preview_path)
+            records.append((sha256, thumbnail_path, preview_path))
+            if not (os.path.exists(thumbnail_file) and os.path.exists(preview_file)):
+                tasks.append((os.path.join(self.image_dir, path), thumbnail_file, preview_file))
+
+        logger.info(f"Rendering derivatives for {len(tasks)} images with {self.workers} processes")
+        failed = set()
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [(task, executor.submit(render_derivatives, task)) for task in tasks]
+            for task, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.warning(f"Could not render derivatives for {task[0]}: {str(e)}")
+                    failed.add(task[1])
+
+        records = [
+            record for record in records
+            if os.path.join(self.image_dir, record[1]) not in failed
+        ]
+        if records:
+            self.db_handler.save_image_derivatives(records)
+        logger.info(f"Recorded derivatives for {len(records)} images")
+        return len(records)
@@ -2,36 +2,26 @@
 import sys
 import os
 from datetime import datetime
-import time
 import argparse
 import pandas as pd
-import requests
 from urllib.parse import urljoin
-import urllib.parse
 
 # Add the project root directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from lib.logger import get_logger
+from lib.metrics import get_metrics
 from lib.scraper import WebScraper
+from lib.http_cache import ResponseCache
+from lib.images import ImageDownloader
+from lib.thumbnails import ThumbnailGenerator
+from lib.dedup import PropertyDeduplicator
 from lib.database import DatabaseHandler
 from lib.data_processor import DataProcessor
 from lib.config import Config
 
 
 
-def get_file_extension(url):
-    """Get the correct file extension from the image URL."""
-    # Extract the path from the URL
-    path = urllib.parse.urlparse(url).path
-    
-    # Get the original extension
-    ext = os.path.splitext(path)[1].lower()
-    
-    # If no extension or not a common image extension, default to .jpg
-    valid_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
-    return ext if ext in valid_extensions else '.jpg'
-
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Immowelt Scraper')
     parser.add_argument('--backup', action='store_true', 
@@ -41,9 +31,62 @@ def parse_arguments():
                         help='Output file name (relative to data directory or absolute path)')
     parser.add_argument('--fix-data', action='store_true',
                         help='Fix and standardize the data format')
+    parser.add_argument('--fix-input', type=str,
+                        help='SQLite database or legacy CSV to fix (defaults to the output database)')
+    parser.add_argument('--chunk-size', type=int,
+                        default=Config.FIX_DATA_CHUNK_SIZE,
+                        help='Rows per chunk when fixing data')
     parser.add_argument('--image-dir', type=str,
                         default='images',
                         help='Directory to store scraped images')
+    parser.add_argument('--workers', type=int,
+                        default=Config.DETAIL_WORKERS,
+                        help='Number of parallel detail page workers')
+    parser.add_argument('--page-workers', type=int,
+                        default=Config.PAGE_WORKERS,
+                        help='Number of search result pages fetched in parallel')
+    parser.add_argument('--rate', type=float,
+                        default=Config.REQUESTS_PER_SECOND,
+                        help='Maximum requests per second per host')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Disable the on-disk HTTP response cache')
+    parser.add_argument('--offline', action='store_true',
+                        help='Replay responses from the HTTP cache only, without network access')
+    parser.add_argument('--download-images', action='store_true',
+                        help='Download the images of new listings into --image-dir')
+    parser.add_argument('--image-workers', type=int,
+                        default=Config.IMAGE_WORKERS,
+                        help='Number of parallel image downloads')
+    parser.add_argument('--thumbnails', action='store_true',
+                        help='Render thumbnails and WebP previews for downloaded images')
+    parser.add_argument('--export-parquet', action='store_true',
+                        help='Export listings to Parquet (full and hot-columns files, requires pyarrow)')
+    parser.add_argument('--export-json', action='store_true',
+                        help='Stream listings to the JSON export path from the database configuration')
+    parser.add_argument('--export-ndjson', action='store_true',
+                        help='Write the JSON export as newline-delimited JSON')
+    parser.add_argument('--export-since', type=str,
+                        help='Only export listings created, closed or re-priced since this date (YYYY-MM-DD)')
+    parser.add_argument('--export-columns', type=str,
+                        help='Comma separated columns to include in the JSON export')
+    parser.add_argument('--metrics-textfile', type=str,
+                        default=Config.METRICS_TEXTFILE,
+                        help='Also write run metrics in Prometheus text format to this file')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only scrape the newest listings until known ones are reached (full sweep when due)')
+    parser.add_argument('--full-sweep-days', type=int,
+                        default=Config.FULL_SWEEP_INTERVAL_DAYS,
+                        help='Days between full sweeps when running incrementally')
+    parser.add_argument('--stop-after', type=int,
+                        default=Config.INCREMENTAL_STOP_AFTER_KNOWN,
+                        help='Consecutive known listings that end an incremental scrape')
+    parser.add_argument('--no-verify-closed', action='store_true',
+                        help='Close vanished listings without checking their exposé first')
+    parser.add_argument('--max-vanished', type=float,
+                        default=Config.CLOSE_VERIFY_MAX_FRACTION,
+                        help='Fraction of active listings that may vanish before closing is skipped as suspicious')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume the last interrupted run, skipping detail pages it already scraped')
     return parser.parse_args()
 
 def ensure_dir(directory):
@@ -51,41 +94,62 @@ def ensure_dir(directory):
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-def download_image(url, image_dir, listing_id):
-    """Download and save an image from URL with correct extension."""
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            # Get the proper file extension
-            ext = get_file_extension(url)
-            
-            # Create filename with correct extension
-            filename = f"{listing_id}_{int(time.time())}{ext}"
-            filepath = os.path.join(image_dir, filename)
-            
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
-            
-            return filename
-    except Exception as e:
-        print(f"Failed to download image {url}: {str(e)}")
-    return None
+def scrape_details(scraper, db_handler, run_id, links):
+    """Scrape detail pages, checkpointing progress so an interrupted run can resume."""
+    logger = get_logger()
+    done = db_handler.load_run_details(run_id)
+    pending = [link for link in links if link not in done]
+    if done:
+        logger.info(f"Skipping {len(done)} detail pages already scraped in this run")
+
+    on_batch = None
+    if Config.DB_CONFIG['checkpoint_enabled']:
+        on_batch = lambda batch: db_handler.save_run_details(run_id, batch)
+
+    with get_metrics().stage('detail_pages'):
+        done.update(scraper.scrape_detail_pages(pending, on_batch=on_batch))
+    return done
+
+def verify_closures(scraper, db_handler, candidates, max_fraction):
+    """Return the vanished listings whose exposé confirms they are closed."""
+    logger = get_logger()
+    active = db_handler.count_listings(status='active')
+    if active and len(candidates) > active * max_fraction:
+        logger.warning(
+            f"{len(candidates)} of {active} active listings vanished "
+            f"({len(scraper.failed_pages)} failed search pages), not closing any listings this run"
+        )
+        return set()
+
+    statuses = scraper.verify_closed_listings(candidates)
+    confirmed = {link for link, status in statuses.items() if status == 'closed'}
+    logger.info(f"Confirmed {len(confirmed)} of {len(candidates)} vanished listings as closed")
+    return confirmed
 
 def main():
     # Initialize logger
     logger = get_logger()
     logger.info("Starting Immowelt Scraper...")
+    metrics = get_metrics()
+    status = 'failed'
+    cache = None
 
-    try:
-        # Parse command line arguments
-        args = parse_arguments()
+    # Parse command line arguments
+    args = parse_arguments()
 
+    try:
         # Ensure image directory exists
         image_dir = os.path.join(Config.DATA_DIR, args.image_dir)
         ensure_dir(image_dir)
 
         # Initialize components
-        scraper = WebScraper()
+        cache = ResponseCache() if (Config.HTTP_CACHE_ENABLED and not args.no_cache) or args.offline else None
+        scraper = WebScraper(
+            workers=args.workers,
+            requests_per_second=args.rate,
+            cache=cache,
+            offline=args.offline
+        )
         db_handler = DatabaseHandler(args.output)
         data_processor = DataProcessor()
 
@@ -97,21 +161,40 @@ def main():
         # Fix data format if requested
         if args.fix_data:
             logger.info("Fixing data format...")
+            fix_input = args.fix_input or db_handler.filename
             data_processor.fix_csv_data(
-                input_file=db_handler.filename,
+                input_file=fix_input,
                 output_file=os.path.join(
                     Config.DATA_DIR,
-                    'fixed_' + os.path.basename(args.output)
-                )
+                    'fixed_' + os.path.basename(fix_input)
+                ),
+                chunksize=args.chunk_size
             )
+            status = 'completed'
             return 0
 
-        # Load existing data
-        existing_df = db_handler.load_existing_data()
+        # Incremental runs only look at the newest listings, until a full sweep is due again
+        mode = 'full'
+        if args.incremental:
+            last_sweep = db_handler.last_full_sweep()
+            if last_sweep and (datetime.now() - last_sweep).days < args.full_sweep_days:
+                mode = 'incremental'
+            else:
+                logger.info("Full sweep is due, scraping all pages")
+
+        run_id = db_handler.start_run(resume=args.resume, mode=mode)
 
         # Scrape current listings
         logger.info("Starting web scraping...")
-        current_listings = scraper.scrape_all_listings()
+        with metrics.stage('search_pages'):
+            if mode == 'incremental':
+                current_listings = scraper.scrape_new_listings(
+                    db_handler.get_known_links,
+                    workers=args.page_workers,
+                    stop_after=args.stop_after
+                )
+            else:
+                current_listings = scraper.scrape_all_listings(workers=args.page_workers)
         
         if not current_listings:
             logger.error("No listings found! Exiting...")
@@ -123,7 +206,8 @@ def main():
         
         # Process scraped data
         logger.info("Processing scraped data...")
-        new_df = data_processor.process_new_data(df_current)
+        with metrics.stage('processing'):
+            new_df = data_processor.process_new_data(df_current)
 
         # Add images column if it doesn't exist
         if 'Images' not in new_df.columns:
@@ -135,58 +219,75 @@ def main():
             new_df['created_date'] = datetime.now().strftime('%Y-%m-%d')
 
             logger.info(f"Scraping detail pages for all {len(new_df)} listings...")
-            for i, (idx, row) in enumerate(new_df.iterrows(), start=1):
-                link = row['Link']
-                logger.info(f"[{i}/{len(new_df)}] Detail scraping: {link}")
-                
-                details = scraper.get_detail_page_info(link)
-                if details:
-                    new_df.at[idx, 'Features'] = '; '.join(details['features'])
-                    new_df.at[idx, 'Vollständige_Adresse'] = details['full_address']
-                    new_df.at[idx, 'Latitude'] = details['latitude']
-                    new_df.at[idx, 'Longitude'] = details['longitude']
-                    
-                    # Store image URLs instead of downloading
-                    image_urls = details.get('image_urls', [])
-                    if image_urls:
-                        new_df.at[idx, 'Images'] = ';'.join(image_urls)
-                else:
-                    logger.warning(f"Could not retrieve details for: {link}")
-                time.sleep(0.5)
+            details = scrape_details(scraper, db_handler, run_id, new_df['Link'])
+            new_df = data_processor.apply_detail_info(new_df, details)
         
               # Handle existing database updates
-        comparison = db_handler.compare_listings(existing_df, new_df)
+        comparison = db_handler.compare_listings_sql(new_df['Link'])
+        if mode == 'incremental':
+            # Only part of the search was seen, closures are left to the next full sweep
+            comparison['closed_listings'] = set()
+        elif comparison['closed_listings'] and args.offline:
+            logger.info("Offline mode: vanished listings cannot be verified, leaving them open")
+            comparison['closed_listings'] = set()
+        elif comparison['closed_listings'] and not args.no_verify_closed:
+            with metrics.stage('verify_closed'):
+                comparison['closed_listings'] = verify_closures(
+                    scraper, db_handler, comparison['closed_listings'], args.max_vanished
+                )
 
         if comparison['new_listings']:
             logger.info(f"Processing {len(comparison['new_listings'])} new listings...")
-            new_links = list(comparison['new_listings'])
-            for i, link in enumerate(new_links, start=1):
-                logger.info(f"[{i}/{len(new_links)}] Detail scraping new listing: {link}")
-
-                details = scraper.get_detail_page_info(link)
-                if details:
-                    idx = new_df[new_df['Link'] == link].index[0]
-                    new_df.at[idx, 'Features'] = '; '.join(details['features'])
-                    new_df.at[idx, 'Vollständige_Adresse'] = details['full_address']
-                    new_df.at[idx, 'Latitude'] = details['latitude']
-                    new_df.at[idx, 'Longitude'] = details['longitude']
-                    
-                    # Store image URLs for new listings
-                    image_urls = details.get('image_urls', [])
-                    if image_urls:
-                        new_df.at[idx, 'Images'] = ';'.join(image_urls)
-                else:
-                    logger.warning(f"Could not retrieve details for: {link}")
-                time.sleep(0.1)
-        # Update database
-        merged_df = db_handler.update_database(existing_df, new_df, comparison)
-        
-        # Save results
+            details = scrape_details(scraper, db_handler, run_id, comparison['new_listings'])
+            new_df = data_processor.apply_detail_info(new_df, details)
+
+        # Save only the changes of this run
         logger.info("Saving results...")
-        db_handler.save_data(merged_df)
+        with metrics.stage('save'):
+            if db_handler.save_changes(new_df, comparison):
+                db_handler.finish_run(run_id)
+
+        # Cluster new listings with near-duplicates of the same property
+        if Config.DEDUP_ENABLED:
+            logger.info("Detecting cross-listed properties...")
+            with metrics.stage('dedup'):
+                PropertyDeduplicator(db_handler).run()
+
+        # Download images of new listings
+        if args.download_images and comparison['new_listings']:
+            logger.info("Downloading images of new listings...")
+            downloader = ImageDownloader(image_dir, db_handler, workers=args.image_workers, requests_per_second=args.rate)
+            with metrics.stage('images'):
+                downloader.download_listing_images(new_df[new_df['Link'].isin(comparison['new_listings'])])
+
+        # Render thumbnails and previews for images without derivatives
+        if args.thumbnails:
+            logger.info("Generating image thumbnails and previews...")
+            with metrics.stage('thumbnails'):
+                if ThumbnailGenerator(image_dir, db_handler).generate():
+                    db_handler.update_listing_derivatives()
+
+        # Materialize today's analytics for the dashboards
+        logger.info("Materializing daily aggregates...")
+        with metrics.stage('aggregates'):
+            db_handler.refresh_daily_aggregates()
+
+        # Columnar export for notebooks and the dashboard
+        if args.export_parquet:
+            logger.info("Exporting listings to Parquet...")
+            db_handler.export_to_parquet()
+
+        if args.export_json:
+            logger.info("Exporting listings to JSON...")
+            db_handler.export_to_json(
+                Config.DB_CONFIG['json_export_path'],
+                columns=args.export_columns.split(',') if args.export_columns else None,
+                since=args.export_since,
+                ndjson=args.export_ndjson
+            )
         
         # Print statistics
-        stats = db_handler.get_statistics(merged_df)
+        stats = db_handler.get_statistics()
         logger.info("\nFinal Statistics:")
         for key, value in stats.items():
             if isinstance(value, float):
@@ -195,14 +296,24 @@ def main():
                 logger.info(f"{key}: {value}")
 
         logger.info("Script completed successfully!")
+        status = 'completed'
         return 0
 
     except KeyboardInterrupt:
         logger.info("\nScript interrupted by user")
+        status = 'interrupted'
         return 130
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}", exc_info=True)
         return 1
+    finally:
+        if cache:
+            cache.close()
+        # Machine-readable report of where the time of this run went
+        report_file = metrics.write_report(status=status)
+        logger.info(f"Run report written to {report_file}")
+        if args.metrics_textfile:
+            metrics.write_prometheus(args.metrics_textfile)
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+import sys
+import os
+import argparse
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.logger import get_logger
+from lib.api import create_server
+from lib.config import Config
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Read-only listings API')
+    parser.add_argument('--db', type=str,
+                        default='miete_trier50km.sqlite',
+                        help='Database file name (relative to data directory or absolute path)')
+    parser.add_argument('--host', type=str,
+                        default=Config.API_HOST,
+                        help='Interface to listen on')
+    parser.add_argument('--port', type=int,
+                        default=Config.API_PORT,
+                        help='Port to listen on')
+    return parser.parse_args()
+
+def main():
+    logger = get_logger()
+    args = parse_arguments()
+
+    db_file = args.db if os.path.isabs(args.db) else os.path.join(Config.DATA_DIR, args.db)
+    server = create_server(db_file, args.host, args.port)
+    logger.info(f"Serving listings API for {db_file} on http://{args.host}:{args.port}/api/listings")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("\nAPI server stopped")
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
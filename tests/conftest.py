@@ -0,0 +1,33 @@
+import os
+import sys
+import pandas as pd
+import pytest
+
+# Add the project root directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.database import DatabaseHandler
+
+
+@pytest.fixture
+def db_handler(tmp_path):
+    handler = DatabaseHandler(str(tmp_path / 'listings.sqlite'))
+    handler.save_data(pd.DataFrame({
+        'Link': [
+            'https://www.immowelt.de/expose/edge',
+            'https://www.immowelt.de/expose/inside',
+            'https://www.immowelt.de/expose/outside',
+        ],
+        'Latitude': [49.7561, 49.70, 49.90],
+        'Longitude': [6.6413, 6.60, 6.60],
+        'Features': [
+            '2 Stellplätze: Garage, Außen-Stellplatz; Balkon; Bodenbelag: Fliesen, Laminat',
+            'Balkon; Keller',
+            'Garage; Garten',
+        ],
+        'Preis_cleaned': [300000.0, 450000.0, None],
+        'Wohnfläche': [90.0, 120.0, 60.0],
+        'Zimmer': [3.0, 4.0, 2.0],
+        'created_date': ['2024-01-01'] * 3,
+    }))
+    return handler
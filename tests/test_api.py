@@ -0,0 +1,89 @@
+import pytest
+
+from lib.api import ApiError, ListingsApi
+from lib.config import Config
+
+
+@pytest.fixture
+def api(db_handler):
+    return ListingsApi(db_handler)
+
+
+@pytest.mark.parametrize('path, params', [
+    ('/api/listings', {'columns': ['nope']}),
+    ('/api/listings', {'order_by': ['-nope']}),
+    ('/api/listings/bbox', {'min_lat': ['49'], 'min_lon': ['6'], 'max_lat': ['50'], 'max_lon': ['7'], 'columns': ['nope']}),
+    ('/api/listings/near', {'lat': ['49.7'], 'lon': ['6.6'], 'columns': ['nope']}),
+    ('/api/listings/search', {'q': ['Balkon'], 'columns': ['nope']}),
+    ('/api/listings/features', {'include': ['Garage'], 'columns': ['nope']}),
+    ('/api/analytics/histogram', {'metric': ['latitude']}),
+    ('/api/analytics/histogram', {'bins': ['0']}),
+    ('/api/analytics/histogram', {'bins': ['-5']}),
+    ('/api/analytics/histogram', {'bins': ['100000']}),
+])
+def test_invalid_arguments_are_bad_requests(api, path, params):
+    with pytest.raises(ApiError) as excinfo:
+        api.handle(path, params)
+    assert excinfo.value.status == 400
+
+
+def test_listings_projection(api):
+    result = api.handle('/api/listings', {'columns': ['Link'], 'limit': ['2']})
+    assert result['total'] == 3
+    assert list(result['items'].columns) == ['Link']
+    assert len(result['items']) == 2
+
+
+def test_search(api):
+    result = api.handle('/api/listings/search', {'q': ['balk'], 'columns': ['Link']})
+    assert sorted(result['items']['Link']) == [
+        'https://www.immowelt.de/expose/edge',
+        'https://www.immowelt.de/expose/inside',
+    ]
+
+
+def test_features(api):
+    result = api.handle('/api/listings/features', {'include': ['Garage'], 'exclude': ['Garten'], 'columns': ['Link']})
+    assert list(result['items']['Link']) == ['https://www.immowelt.de/expose/edge']
+    result = api.handle('/api/listings/features', {'include': ['Sauna'], 'columns': ['Link']})
+    assert result['items'].empty
+
+
+@pytest.mark.parametrize('path, params', [
+    ('/api/listings', {}),
+    ('/api/listings/search', {'q': ['Balkon']}),
+    ('/api/listings/features', {'include': ['Balkon']}),
+])
+@pytest.mark.parametrize('page', [{'limit': ['-1']}, {'limit': ['0']}, {'offset': ['-1']}])
+def test_invalid_pages_are_bad_requests(api, path, params, page):
+    with pytest.raises(ApiError) as excinfo:
+        api.handle(path, {**params, **page})
+    assert excinfo.value.status == 400
+
+
+def test_limit_is_capped(api, monkeypatch):
+    monkeypatch.setattr(Config, 'API_MAX_LIMIT', 2)
+    result = api.handle('/api/listings', {'limit': ['1000']})
+    assert result['limit'] == 2
+    assert len(result['items']) == 2
+
+
+def test_histogram(api):
+    buckets = api.handle('/api/analytics/histogram', {'metric': ['rooms'], 'bins': ['2']})
+    assert [bucket['count'] for bucket in buckets] == [1, 2]
+    assert all(bucket['bin_end'] > bucket['bin_start'] for bucket in buckets)
+
+
+def assert_summary_types(summary):
+    assert summary['Total listings'] == 3
+    assert type(summary['Total listings']) is int
+    assert type(summary['Unique active properties']) is int
+    assert summary['Average Preis_cleaned'] == 375000.0
+    assert type(summary['Average Preis_cleaned']) is float
+
+
+def test_summary_keeps_counts_integral(api, db_handler):
+    assert_summary_types(api.handle('/api/analytics/summary', {}))
+    # Served from the materialized aggregates once they exist
+    db_handler.refresh_daily_aggregates()
+    assert_summary_types(api.handle('/api/analytics/summary', {}))
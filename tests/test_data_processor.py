@@ -0,0 +1,50 @@
+import os
+
+import pandas as pd
+import pytest
+
+from lib import parsers
+from lib.data_processor import DataProcessor
+
+# One scraped row per distinct Preis/Details format of data/miete_trier50km_detailed2.csv
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'listings_sample.csv')
+PARSED_COLUMNS = ['Preis_cleaned', 'Wohnfläche', 'Grundstücksfläche', 'Zimmer', 'Preis_pro_qm']
+
+
+def rowwise_clean(df):
+    """The previous per-row implementation of the parsed columns"""
+    cleaned_df = df.copy()
+    cleaned_df['Preis_cleaned'] = cleaned_df['Preis'].apply(parsers.clean_price)
+    cleaned_df['Wohnfläche'] = cleaned_df['Details'].apply(parsers.extract_sqm)
+    cleaned_df['Grundstücksfläche'] = cleaned_df['Details'].apply(parsers.extract_plot_size)
+    cleaned_df['Zimmer'] = cleaned_df['Details'].apply(parsers.extract_rooms)
+    cleaned_df['Preis_pro_qm'] = cleaned_df.apply(
+        lambda row: row['Preis_cleaned'] / row['Wohnfläche']
+        if pd.notna(row['Preis_cleaned']) and pd.notna(row['Wohnfläche']) and row['Wohnfläche'] > 0
+        else None,
+        axis=1
+    )
+    return cleaned_df
+
+
+@pytest.fixture
+def sample():
+    return pd.read_csv(SAMPLE_CSV, dtype={'Preis': object, 'Details': object})
+
+
+@pytest.mark.parametrize('column', PARSED_COLUMNS)
+def test_clean_data_matches_rowwise_parsers(sample, column):
+    expected = rowwise_clean(sample)
+    actual = DataProcessor()._clean_data(sample)
+    pd.testing.assert_series_equal(
+        actual[column].astype('float64'), expected[column].astype('float64'),
+        check_names=False, check_exact=True
+    )
+
+
+def test_clean_data_parses_formats(sample):
+    cleaned = DataProcessor()._clean_data(sample).set_index('Details')
+    row = cleaned.loc['5 Zimmer·316,7 m²·412 m² Grundstück']
+    assert row[['Wohnfläche', 'Grundstücksfläche', 'Zimmer']].tolist() == [316.7, 412.0, 5.0]
+    assert cleaned.loc['5 Zimmer·1.058 m² Grundstück', 'Grundstücksfläche'] == 1058.0
+    assert pd.isna(cleaned.loc['3 Zimmer·92 m²·2. Geschoss', 'Preis_cleaned'])  # Preis auf Anfrage
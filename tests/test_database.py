@@ -0,0 +1,106 @@
+import pandas as pd
+import pytest
+
+from lib.database import DatabaseHandler
+
+
+def test_query_bbox_keeps_listings_on_the_edge(db_handler):
+    assert db_handler.has_spatial_index
+    df = db_handler.query_bbox(49.60, 6.50, 49.7561, 6.6413, columns=['Link'])
+    assert sorted(df['Link']) == [
+        'https://www.immowelt.de/expose/edge',
+        'https://www.immowelt.de/expose/inside',
+    ]
+
+    df = db_handler.query_bbox(49.7561, 6.6413, 49.80, 6.70, columns=['Link'])
+    assert list(df['Link']) == ['https://www.immowelt.de/expose/edge']
+
+
+def test_query_listings_rejects_invalid_arguments(db_handler):
+    assert len(db_handler.query_listings(columns=['Link'], status='active')) == 3
+    with pytest.raises(ValueError):
+        db_handler.query_listings(filters={'nope': (1, 2)})
+    with pytest.raises(ValueError):
+        db_handler.query_listings(columns=['nope'])
+    with pytest.raises(ValueError):
+        db_handler.query_listings(order_by='-nope')
+    with pytest.raises(ValueError):
+        db_handler.query_listings(status='gone')
+
+
+def test_search_listings_folds_umlauts_and_sharp_s(tmp_path):
+    handler = DatabaseHandler(str(tmp_path / 'listings.sqlite'))
+    assert handler.has_fulltext_index
+    handler.save_data(pd.DataFrame({
+        'Link': ['https://www.immowelt.de/expose/kueche', 'https://www.immowelt.de/expose/other'],
+        'Features': ['Einbauküche; Fußbodenheizung', 'Balkon'],
+        'Adresse': ['Große Straße 3, Trier', 'Trier'],
+        'created_date': ['2024-01-01'] * 2,
+    }))
+    for text in ['Einbauküche', 'Einbaukueche', 'fussboden', 'Fußboden', 'grosse strasse']:
+        assert list(handler.search_listings(text, columns=['Link'])['Link']) == [
+            'https://www.immowelt.de/expose/kueche'
+        ], text
+
+    handler.has_fulltext_index = False
+    assert len(handler.search_listings('Einbaukueche', columns=['Link'])) == 1
+
+    with handler._connect() as conn:
+        conn.execute("UPDATE listings SET Features = 'Einbauküche; Gäste-WC' WHERE Link LIKE '%kueche'")
+        conn.execute("INSERT INTO listings_fts (listings_fts) VALUES ('integrity-check')")
+    handler.has_fulltext_index = True
+    assert len(handler.search_listings('gaeste', columns=['Link'])) == 1
+    assert handler.search_listings('fussboden', columns=['Link']).empty
+
+
+def test_query_by_features_on_scraped_features(tmp_path):
+    # Features strings as scraped, taken from data/miete_trier50km_detailed2.csv
+    features = [
+        'Nach Absprache.; 2 Stellplätze: 2 Außen-Stellplätze; Balkon; Badezimmer: Badewanne, Bad mit Dusche, '
+        'Bad mit Fenster; Gäste-WC; Einbauküche; Garten; voll unterkellert',
+        'Balkon; Erdgeschoss; Kelleranteil; Bodenbelag: Fliesen, Parkett; Denkmalschutz-Afa',
+        'sofort; Außen-Stellplatz; Balkon; 2. Geschoss; Badezimmer: Bad mit Dusche, Bad mit Fenster; Gäste-WC; '
+        'Kelleranteil; Haustiere erlaubt',
+        'sofort; 2 Stellplätze: Garage, Außen-Stellplatz; Balkon; 3 Geschosse; Badezimmer: Badewanne, '
+        'Bad mit Dusche, Bad mit Fenster; Einbauküche; Garten; Kein Keller',
+        'Bezug nach Absprache; Stellplatz; 1. Geschoss; Bad mit Dusche; Einbauküche; Kelleranteil; Terrasse; '
+        'Bodenbelag: Fliesen, Parkett, Teppich',
+    ]
+    db_handler = DatabaseHandler(str(tmp_path / 'listings.sqlite'))
+    db_handler.save_data(pd.DataFrame({
+        'Link': [f'https://www.immowelt.de/expose/listing-{i}' for i in range(len(features))],
+        'Features': features,
+    }))
+
+    def links(**kwargs):
+        df = db_handler.query_by_features(columns=['Link'], **kwargs)
+        return [int(link.rsplit('-', 1)[1]) for link in df['Link']]
+
+    assert links(include=['Balkon', 'Keller'], exclude=['Erdgeschoss']) == [0, 2]
+    assert links(include=['Bezug: sofort', 'Badezimmer: Bad mit Dusche']) == [2, 3]
+    assert links(include=['Bezug: nach Vereinbarung', 'Badezimmer: Bad mit Dusche']) == [0, 4]
+    assert links(include=['Garage']) == [3]
+
+    counts = {row['feature']: row['count'] for row in db_handler.get_feature_counts(include=['Balkon'])}
+    assert counts['Keller'] == 3
+    assert counts['Kein Keller'] == 1
+
+
+def test_refresh_daily_aggregates_groups_by_type_and_region(tmp_path):
+    db_handler = DatabaseHandler(str(tmp_path / 'listings.sqlite'))
+    db_handler.save_data(pd.DataFrame({
+        'Link': [f'https://www.immowelt.de/expose/listing-{i}' for i in range(4)],
+        'Beschreibung': ['Wohnung zum Kauf', 'Wohnung zum Kauf', 'Haus zum Kauf', 'Wohnung zum Kauf'],
+        'Adresse': ['Olewig 3, Trier (54295)', 'Trier (54290)', 'Konz (54329)', 'Trier (54292)'],
+        'Preis_cleaned': [200000.0, 300000.0, 400000.0, 999000.0],
+        'created_date': ['2025-01-01', '2025-01-01', '2025-01-02', '2025-01-01'],
+        'closed_date': [None, None, None, '2025-01-02'],
+    }))
+    assert db_handler.refresh_daily_aggregates('2025-01-02')
+
+    df = db_handler.get_daily_aggregates().set_index(['property_type', 'region'])
+    assert df.loc[('Wohnung', 'Trier'), ['total_count', 'active_count', 'closed_count']].tolist() == [3, 2, 1]
+    assert df.loc[('Wohnung', 'Trier'), 'price_mean'] == 250000.0
+    assert df.loc[('all', 'all'), ['total_count', 'active_count', 'new_count']].tolist() == [4, 3, 1]
+    assert df.loc[('all', 'all'), 'price_median'] == 300000.0
+    assert df.loc[('Haus', 'all'), 'price_max'] == 400000.0
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from lib.database import DatabaseHandler
+from lib.dedup import PropertyDeduplicator
+
+TEMPLATE = {
+    'Beschreibung': 'Einfamilienhaus zum Kauf',
+    'Details': '4 Zimmer · 131 m² · 572 m² Grundstück',
+    'Features': 'Neubau; 2 Stellplätze: Garage, Außen-Stellplatz; Bodenbelag: Fliesen, Laminat; Terrasse; Garten',
+    'Latitude': 49.6921,
+    'Longitude': 6.5731,
+    'Wohnfläche': 131.0,
+}
+
+
+def clusters(tmp_path, listings):
+    db_handler = DatabaseHandler(str(tmp_path / 'listings.sqlite'))
+    df = pd.DataFrame([{**TEMPLATE, **listing} for listing in listings])
+    df['Link'] = [f'https://www.immowelt.de/expose/house-{i}' for i in range(len(df))]
+    db_handler.save_data(df)
+    PropertyDeduplicator(db_handler).run()
+    return list(db_handler.query_listings(columns=['property_cluster_id'])['property_cluster_id'])
+
+
+def test_cross_listed_property_is_merged(tmp_path):
+    listing = {'Zimmer': 4.0, 'Grundstücksfläche': 572.0, 'Preis_cleaned': 405810.0}
+    first, second = clusters(tmp_path, [listing, {**listing, 'Grundstücksfläche': 572.4}])
+    assert first == second
+
+
+def test_template_houses_are_not_merged(tmp_path):
+    # Same developer text and location, but a different plot, room count and price
+    first, second, third = clusters(tmp_path, [
+        {'Zimmer': 4.0, 'Grundstücksfläche': 572.0, 'Preis_cleaned': 405810.0},
+        {'Zimmer': 4.0, 'Grundstücksfläche': 735.0, 'Preis_cleaned': 410890.0},
+        {'Zimmer': 5.0, 'Grundstücksfläche': 572.0, 'Preis_cleaned': 398400.0},
+    ])
+    assert len({first, second, third}) == 3
+
+
+def test_parquet_export_after_dedup(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    listing = {'Zimmer': 4.0, 'Grundstücksfläche': 572.0, 'Preis_cleaned': 405810.0}
+    db_handler = DatabaseHandler(str(tmp_path / 'listings.sqlite'))
+    df = pd.DataFrame([{**TEMPLATE, **listing}, {**TEMPLATE, **listing, 'Zimmer': 5.0}])
+    df['Link'] = ['https://www.immowelt.de/expose/house-0', 'https://www.immowelt.de/expose/house-1']
+    db_handler.save_data(df)
+    PropertyDeduplicator(db_handler).run()
+
+    output_file = tmp_path / 'listings.parquet'
+    hot_output_file = tmp_path / 'listings_hot.parquet'
+    assert db_handler.export_to_parquet(str(output_file), str(hot_output_file))
+    table = pq.read_table(output_file)
+    assert str(table.schema.field('property_cluster_id').type) == 'int64'
+    assert table.column('property_cluster_id').to_pylist() == [1, 2]
+    assert sorted(path.name for path in tmp_path.iterdir() if path.suffix == '.tmp') == []
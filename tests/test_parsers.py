@@ -0,0 +1,39 @@
+from lib.parsers import feature_names
+
+
+# Features strings as scraped, taken from data/miete_trier50km_detailed2.csv
+def test_feature_names_splits_grouped_values():
+    assert feature_names(
+        '3 Stellplätze: Garage, 2 Außen-Stellplätze; Bidet; Waschraum; voll unterkellert; '
+        'voll klimatisiert; Bodenbelag: Laminat, Stein; Sauna; Fernblick'
+    ) == [
+        'Garage', 'Außen-Stellplatz', 'Badezimmer: Bidet', 'Waschraum', 'voll unterkellert', 'Keller',
+        'voll klimatisiert', 'Bodenbelag: Laminat', 'Bodenbelag: Stein', 'Sauna', 'Fernblick'
+    ]
+
+
+def test_feature_names_drops_parking_counts():
+    assert feature_names(
+        '26 Stellplätze: Garage, 22 Außen-Stellplätze; Kein Keller; Bodenbelag: Fliesen; Kabelanschluss'
+    ) == ['Garage', 'Außen-Stellplatz', 'Kein Keller', 'Bodenbelag: Fliesen', 'Kabelanschluss']
+    assert feature_names('kurzfristig nach Vereinbarung; 2 Stellplätze: 2 Carports; Gäste-WC')[1] == 'Carport'
+    assert feature_names('Frei ab sofort; 2 Stellplätze; Balkon') == ['Bezug: sofort', 'Stellplatz', 'Balkon']
+
+
+def test_feature_names_folds_spellings_into_facets():
+    assert feature_names(
+        'Bezug nach Absprache; Stellplatz; 1. Geschoss; Bad mit Dusche; Einbauküche; Kelleranteil; Terrasse; '
+        'Bodenbelag: Fliesen, Parkett, Teppich'
+    ) == [
+        'Bezug: nach Vereinbarung', 'Stellplatz', '1. Geschoss', 'Badezimmer: Bad mit Dusche', 'Einbauküche',
+        'Kelleranteil', 'Keller', 'Terrasse', 'Bodenbelag: Fliesen', 'Bodenbelag: Parkett', 'Bodenbelag: Teppich'
+    ]
+    assert feature_names('Ab sofort; Badewanne; offener Kamin') == [
+        'Bezug: sofort', 'Badezimmer: Badewanne', 'offener Kamin'
+    ]
+    assert 'Keller' not in feature_names('sofort; Balkon; 3 Geschosse; Kein Keller')
+
+
+def test_feature_names_without_features():
+    assert feature_names(None) == []
+    assert feature_names(float('nan')) == []
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from lib.scraper import WebScraper
+from standin_server import StandInServer
+
+
+@pytest.fixture
+def server():
+    server = StandInServer(closed=['gone']).start()
+    yield server
+    server.stop()
+
+
+def test_check_listing_status_against_standin_server(server):
+    scraper = WebScraper(workers=2, requests_per_second=1000)
+    statuses = scraper.verify_closed_listings([
+        f"{server.base_url}/expose/gone",
+        f"{server.base_url}/expose/still-there",
+    ])
+    assert statuses == {
+        f"{server.base_url}/expose/gone": 'closed',
+        f"{server.base_url}/expose/still-there": 'active',
+    }
+    # Answered by HEAD alone, without falling back to GET
+    assert server.requests == 2